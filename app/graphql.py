@@ -1,46 +1,63 @@
-import asyncio
 import datetime
-from typing import List, Dict
+from typing import List, Optional
 import strawberry
 from strawberry.dataloader import DataLoader
 from strawberry.fastapi import GraphQLRouter, BaseContext
+from common.store import TASKS_DB, STORIES_DB, roundtrip
+from common.cache import cached
+from common.coalesce import coalesced
+from common.schema import schema_extensions
+from common.pagination import Page
+from common.partition import PartitionedLoader
 from dataclasses import field
 
-# Mock database for tasks
-TASKS_DB = [
-    {"id": 1, "name": "Task 1", "owner": 201, "done": False, "story_id": 1},
-    {"id": 2, "name": "Task 2", "owner": 202, "done": True, "story_id": 2},
-    {"id": 3, "name": "Task 3", "owner": 203, "done": False, "story_id": 1},
-]
-
-# Mock database for stories
-STORIES_DB = [
-    {"id": 1, "name": "Story 1", "owner": 101, "point": 5, "sprint_id": 1},
-    {"id": 2, "name": "Story 2", "owner": 102, "point": 8, "sprint_id": 1},
-    {"id": 3, "name": "Story 3", "owner": 103, "point": 3, "sprint_id": 2},
-]
 
+@cached(invalidate_on=(TASKS_DB, 'story_id'))
+@coalesced()
 async def batch_load_tasks(story_ids: List[int]):
-    await asyncio.sleep(0.01)  # Simulate async DB call
-    story_id_to_tasks: Dict[int, List[Dict]] = {sid: [] for sid in story_ids}
-    for t in TASKS_DB:
-        if t["story_id"] in story_id_to_tasks:
-            story_id_to_tasks[t["story_id"]].append(dict(id=t["id"], name=t["name"], owner=t["owner"], done=t["done"]))
-    return [story_id_to_tasks[sid] for sid in story_ids]
+    await roundtrip()  # Simulate async DB call
+    return [[dict(id=t["id"], name=t["name"], owner=t["owner"], done=t["done"]) for t in tasks]
+            for tasks in TASKS_DB.group_by('story_id', story_ids)]
 
+@cached(invalidate_on=(STORIES_DB, 'sprint_id'))
+@coalesced()
 async def batch_load_stories(sprint_ids: List[int]):
-    await asyncio.sleep(0.01)  # Simulate async DB call
-    sprint_id_to_stories: Dict[int, List[Dict]] = {sid: [] for sid in sprint_ids}
-    for s in STORIES_DB:
-        if s["sprint_id"] in sprint_id_to_stories:
-            sprint_id_to_stories[s["sprint_id"]].append(dict(id=s["id"], name=s["name"], owner=s["owner"], point=s["point"]))
-    return [sprint_id_to_stories[sid] for sid in sprint_ids]
+    await roundtrip()  # Simulate async DB call
+    return [[dict(id=s["id"], name=s["name"], owner=s["owner"], point=s["point"]) for s in stories]
+            for stories in STORIES_DB.group_by('sprint_id', sprint_ids)]
+
+# pages of children, one batch per distinct page (PartitionedLoader), not cached
+async def batch_load_task_pages(page: Page, story_ids: List[int]):
+    await roundtrip()  # Simulate async DB call
+    return [[dict(id=t["id"], name=t["name"], owner=t["owner"], done=t["done"]) for t in tasks]
+            for tasks in TASKS_DB.page_by('story_id', story_ids, page)]
+
+async def batch_load_story_pages(page: Page, sprint_ids: List[int]):
+    await roundtrip()  # Simulate async DB call
+    return [[dict(id=s["id"], name=s["name"], owner=s["owner"], point=s["point"]) for s in stories]
+            for stories in STORIES_DB.page_by('sprint_id', sprint_ids, page)]
+
+@cached(invalidate_on=(TASKS_DB, 'story_id'))
+@coalesced()
+async def batch_load_task_counts(story_ids: List[int]):
+    await roundtrip()  # Simulate async DB call
+    return TASKS_DB.count_by('story_id', story_ids)
+
+@cached(invalidate_on=(STORIES_DB, 'sprint_id'))
+@coalesced()
+async def batch_load_story_counts(sprint_ids: List[int]):
+    await roundtrip()  # Simulate async DB call
+    return STORIES_DB.count_by('sprint_id', sprint_ids)
 
 # Custom context class inheriting from BaseContext
 class CustomContext(BaseContext):
     def __init__(self):
         self.task_loader = DataLoader(load_fn=batch_load_tasks)
         self.story_loader = DataLoader(load_fn=batch_load_stories)
+        self.task_page_loader = PartitionedLoader(load_fn=batch_load_task_pages)
+        self.story_page_loader = PartitionedLoader(load_fn=batch_load_story_pages)
+        self.task_count_loader = DataLoader(load_fn=batch_load_task_counts)
+        self.story_count_loader = DataLoader(load_fn=batch_load_story_counts)
         self.name = "tangkikodo"
 
 # Dependency that returns the custom context
@@ -70,17 +87,37 @@ class SprintBase:
 @strawberry.type
 class Story(StoryBase):
     @strawberry.field
-    async def tasks(self, info: strawberry.Info) -> List["TaskBase"]:
-        results = await info.context.task_loader.load(self.id)
+    async def tasks(self, info: strawberry.Info, first: Optional[int] = None, offset: int = 0,
+                    after: Optional[int] = None) -> List["TaskBase"]:
+        """first / offset / after (id of the last task of the previous page) paginate the tasks"""
+        page = Page(first, offset, after)
+        if page.unbounded:
+            results = await info.context.task_loader.load(self.id)
+        else:
+            results = await info.context.task_page_loader.load((self.id, page))
         return [TaskBase(**task) for task in results]
 
+    @strawberry.field
+    async def task_count(self, info: strawberry.Info) -> int:
+        return await info.context.task_count_loader.load(self.id)
+
 @strawberry.type
 class Sprint(SprintBase):
     @strawberry.field
-    async def stories(self, info: strawberry.Info) -> List["Story"]:
-        results = await info.context.story_loader.load(self.id)
+    async def stories(self, info: strawberry.Info, first: Optional[int] = None, offset: int = 0,
+                      after: Optional[int] = None) -> List["Story"]:
+        """first / offset / after (id of the last story of the previous page) paginate the stories"""
+        page = Page(first, offset, after)
+        if page.unbounded:
+            results = await info.context.story_loader.load(self.id)
+        else:
+            results = await info.context.story_page_loader.load((self.id, page))
         return [Story(**story) for story in results]
 
+    @strawberry.field
+    async def story_count(self, info: strawberry.Info) -> int:
+        return await info.context.story_count_loader.load(self.id)
+
 
 @strawberry.type
 class Query:
@@ -103,7 +140,7 @@ class Query:
         return [sprint1, sprint2] * 10
 
 
-schema = strawberry.Schema(query=Query)
+schema = strawberry.Schema(query=Query, extensions=schema_extensions())
 
 graphql_app = GraphQLRouter(
     schema,
@@ -1,10 +1,12 @@
 from fastapi import FastAPI
+from common.metrics import install as install_metrics
 from .graphql import graphql_app
 from .resolver import router as rest_router
 from .resolver_dataclass import router as rest_router_dataclass
 from .resolver_strawberry_type import router as rest_router_strawberry
 
 app = FastAPI()
+install_metrics(app)
 app.include_router(graphql_app, prefix="/graphql")
 app.include_router(rest_router)
 app.include_router(rest_router_dataclass, prefix="/dc")
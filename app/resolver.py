@@ -1,4 +1,3 @@
-import asyncio
 from pydantic import BaseModel
 from typing import List
 import datetime
@@ -6,8 +5,17 @@ from aiodataloader import DataLoader
 from typing import List
 from pydantic_resolve import LoaderDepend, ensure_subset
 from fastapi import APIRouter
-from pydantic_resolve import Resolver
-from pydantic import Field
+from common.store import TASKS_DB, STORIES_DB, roundtrip
+from common.cache import cached
+from common.coalesce import coalesced
+from common.singleflight import single_flight
+from common.response_cache import cached_response
+from common.stream import StreamFormat, stream_resolved
+from common.resolver import Resolver
+from common.plan import precompile
+from common.projection import columns
+from common.pagination import Page
+from pydantic import Field, NonNegativeInt
 
 class BaseTask(BaseModel):
     id: int
@@ -26,37 +34,47 @@ class BaseSprint(BaseModel):
     name: str
     start: datetime.datetime
 
-# Mock database for tasks
-TASKS_DB = [
-    {"id": 1, "name": "Task 1", "owner": 201, "done": False, "story_id": 1},
-    {"id": 2, "name": "Task 2", "owner": 202, "done": True, "story_id": 2},
-    {"id": 3, "name": "Task 3", "owner": 203, "done": False, "story_id": 1},
-]
-
-# Mock database for stories
-STORIES_DB = [
-    {"id": 1, "name": "Story 1", "owner": 101, "point": 5, "sprint_id": 1},
-    {"id": 2, "name": "Story 2", "owner": 102, "point": 8, "sprint_id": 1},
-    {"id": 3, "name": "Story 3", "owner": 103, "point": 3, "sprint_id": 2},
-]
 
 class TaskLoader(DataLoader):
+    @cached(invalidate_on=(TASKS_DB, 'story_id'))
+    @coalesced()
     async def batch_load_fn(self, story_ids: List[int]) -> List[List[BaseTask]]:
-        await asyncio.sleep(0.01)  # Simulate async DB call
-        story_id_to_tasks = {sid: [] for sid in story_ids}
-        for t in TASKS_DB:
-            if t["story_id"] in story_id_to_tasks:
-                story_id_to_tasks[t["story_id"]].append(t)
-        return [story_id_to_tasks[sid] for sid in story_ids]
+        await roundtrip()  # Simulate async DB call
+        return TASKS_DB.group_by('story_id', story_ids, columns=columns(self))
 
 class StoryLoader(DataLoader):
+    @cached(invalidate_on=(STORIES_DB, 'sprint_id'))
+    @coalesced()
+    async def batch_load_fn(self, sprint_ids: List[int]) -> List[List[BaseStory]]:
+        await roundtrip()  # Simulate async DB call
+        return STORIES_DB.group_by('sprint_id', sprint_ids, columns=columns(self))
+
+# pages of children, not cached: the result depends on the page
+class TaskPageLoader(DataLoader):
+    page: Page = Page()
+    async def batch_load_fn(self, story_ids: List[int]) -> List[List[BaseTask]]:
+        await roundtrip()  # Simulate async DB call
+        return TASKS_DB.page_by('story_id', story_ids, self.page, columns=columns(self))
+
+class StoryPageLoader(DataLoader):
+    page: Page = Page()
     async def batch_load_fn(self, sprint_ids: List[int]) -> List[List[BaseStory]]:
-        await asyncio.sleep(0.01)  # Simulate async DB call
-        sprint_id_to_stories = {sid: [] for sid in sprint_ids}
-        for s in STORIES_DB:
-            if s["sprint_id"] in sprint_id_to_stories:
-                sprint_id_to_stories[s["sprint_id"]].append(s)
-        return [sprint_id_to_stories[sid] for sid in sprint_ids]
+        await roundtrip()  # Simulate async DB call
+        return STORIES_DB.page_by('sprint_id', sprint_ids, self.page, columns=columns(self))
+
+class TaskCountLoader(DataLoader):
+    @cached(invalidate_on=(TASKS_DB, 'story_id'))
+    @coalesced()
+    async def batch_load_fn(self, story_ids: List[int]) -> List[int]:
+        await roundtrip()  # Simulate async DB call
+        return TASKS_DB.count_by('story_id', story_ids)
+
+class StoryCountLoader(DataLoader):
+    @cached(invalidate_on=(STORIES_DB, 'sprint_id'))
+    @coalesced()
+    async def batch_load_fn(self, sprint_ids: List[int]) -> List[int]:
+        await roundtrip()  # Simulate async DB call
+        return STORIES_DB.count_by('sprint_id', sprint_ids)
 
 
 # ---- business model ------
@@ -87,6 +105,25 @@ class Sprint(BaseSprint):
     def resolve_simple_stories(self, loader=LoaderDepend(StoryLoader)):
         return loader.load(self.id)
 
+# paginated children with their totals
+class PagedStory(BaseStory):
+    tasks: list[BaseTask] = []
+    def resolve_tasks(self, loader=LoaderDepend(TaskPageLoader)):
+        return loader.load(self.id)
+
+    task_count: int = 0
+    def resolve_task_count(self, loader=LoaderDepend(TaskCountLoader)):
+        return loader.load(self.id)
+
+class PagedSprint(BaseSprint):
+    stories: list[PagedStory] = []
+    def resolve_stories(self, loader=LoaderDepend(StoryPageLoader)):
+        return loader.load(self.id)
+
+    story_count: int = 0
+    def resolve_story_count(self, loader=LoaderDepend(StoryCountLoader)):
+        return loader.load(self.id)
+
 
 # yet another way, you can even mimic the GraphQL response structure (data, error)
 class Query(BaseModel):
@@ -109,6 +146,13 @@ class Tree(BaseModel):
     children: list['Tree'] = Field(default_factory=list)
     
 router = APIRouter()
+precompile(Sprint, Query, PagedSprint)  # resolution plans, see common/plan.py
+
+# rows each node is built from, for response cache invalidation
+SPRINT_DEPENDENCIES = {
+    Sprint: (STORIES_DB, 'sprint_id'),
+    SimpleStory: (TASKS_DB, 'story_id'),
+}
 
 @router.get('/plain-sprints', response_model=list[BaseSprint])
 async def get_sprints():
@@ -125,6 +169,8 @@ async def get_sprints():
     return [sprint1, sprint2]
 
 @router.get('/sprints', response_model=list[Sprint])
+@single_flight(list[Sprint])
+@cached_response(list[Sprint], depends_on=SPRINT_DEPENDENCIES)
 async def get_sprints():
     sprint1 = Sprint(
         id=1,
@@ -138,7 +184,43 @@ async def get_sprints():
     )
     return await Resolver().resolve([sprint1, sprint2] * 10)
 
+@router.get('/sprints-stream')
+async def stream_sprints(chunk: int = 4, format: StreamFormat = 'ndjson'):
+    sprint1 = Sprint(
+        id=1,
+        name="Sprint 1",
+        start=datetime.datetime(2025, 6, 12)
+    )
+    sprint2 = Sprint(
+        id=2,
+        name="Sprint 2",
+        start=datetime.datetime(2025, 7, 1)
+    )
+    return stream_resolved(Sprint, [sprint1, sprint2] * 10, chunk=chunk, format=format)
+
+@router.get('/sprints-page', response_model=list[PagedSprint])
+async def get_sprints_page(limit: NonNegativeInt = 10, offset: NonNegativeInt = 0):
+    """limit / offset per parent: stories per sprint and tasks per story, with their totals"""
+    sprint1 = PagedSprint(
+        id=1,
+        name="Sprint 1",
+        start=datetime.datetime(2025, 6, 12)
+    )
+    sprint2 = PagedSprint(
+        id=2,
+        name="Sprint 2",
+        start=datetime.datetime(2025, 7, 1)
+    )
+    return await Resolver(
+        loader_params={
+            StoryPageLoader: {'page': Page(limit, offset)},
+            TaskPageLoader: {'page': Page(limit, offset)},
+        }
+    ).resolve([sprint1, sprint2])
+
 @router.get('/sprints-query', response_model=Query)
+@single_flight(Query)
+@cached_response(Query, depends_on=SPRINT_DEPENDENCIES)
 async def get_sprints_query():
     return await Resolver().resolve(Query())
 
@@ -3,7 +3,9 @@ from dataclasses import field
 import datetime
 from pydantic_resolve import LoaderDepend, ensure_subset
 from fastapi import APIRouter
-from pydantic_resolve import Resolver
+from common.singleflight import single_flight
+from common.resolver import Resolver
+from common.plan import precompile
 from .graphql import batch_load_tasks, batch_load_stories, StoryBase, TaskBase, SprintBase
 import strawberry
 
@@ -36,8 +38,10 @@ class Sprint(SprintBase):
 
     
 router = APIRouter()
+precompile(Sprint)  # resolution plans, see common/plan.py
 
 @router.get('/sprints', response_model=list[Sprint])
+@single_flight(list[Sprint])
 async def get_sprints():
     sprint1 = Sprint(
         id=1,
@@ -1,12 +1,16 @@
 from fastapi import FastAPI
+from common.metrics import install as install_metrics
 from .graphql import graphql_app
 from .resolver import router as rest_router
 from .resolver_dataclass import router as rest_dc_router
+from .resolver_compact import router as rest_compact_router
 
 app = FastAPI()
+install_metrics(app)
 app.include_router(graphql_app, prefix="/graphql")
 app.include_router(rest_router)
 app.include_router(rest_dc_router, prefix='/dc')
+app.include_router(rest_compact_router, prefix='/cp')
 
 app.get('/base-test')
 async def get_base():
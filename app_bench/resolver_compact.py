@@ -0,0 +1,53 @@
+import datetime
+from fastapi import APIRouter
+from common.store import TASKS_DB, STORIES_DB
+from common.singleflight import single_flight
+from common.response_cache import cached_response
+from common.stream import StreamFormat, stream_resolved
+from common.resolver import Resolver
+from common.plan import precompile
+from common.compact import compact
+from .resolver import Sprint, Story
+
+# slots dataclasses generated from the pydantic view classes, same loaders, same JSON
+CompactSprint = compact(Sprint)
+CompactStory = compact(Story)
+
+router = APIRouter()
+precompile(CompactSprint)  # resolution plans, see common/plan.py
+
+# rows each node is built from, for response cache invalidation
+SPRINT_DEPENDENCIES = {
+    CompactSprint: (STORIES_DB, 'sprint_id'),
+    CompactStory: (TASKS_DB, 'story_id'),
+}
+
+@router.get('/sprints', response_model=list[CompactSprint])
+@single_flight(list[CompactSprint])
+@cached_response(list[CompactSprint], depends_on=SPRINT_DEPENDENCIES)
+async def get_sprints():
+    sprint1 = CompactSprint(
+        id=1,
+        name="Sprint 1",
+        start=datetime.datetime(2025, 6, 12)
+    )
+    sprint2 = CompactSprint(
+        id=2,
+        name="Sprint 2",
+        start=datetime.datetime(2025, 7, 1)
+    )
+    return await Resolver().resolve([sprint1, sprint2] * 10)
+
+@router.get('/sprints-stream')
+async def stream_sprints(chunk: int = 4, format: StreamFormat = 'ndjson'):
+    sprint1 = CompactSprint(
+        id=1,
+        name="Sprint 1",
+        start=datetime.datetime(2025, 6, 12)
+    )
+    sprint2 = CompactSprint(
+        id=2,
+        name="Sprint 2",
+        start=datetime.datetime(2025, 7, 1)
+    )
+    return stream_resolved(CompactSprint, [sprint1, sprint2] * 10, chunk=chunk, format=format)
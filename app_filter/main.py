@@ -1,7 +1,9 @@
 from fastapi import FastAPI
+from common.metrics import install as install_metrics
 from .graphql import graphql_app
 from .resolver import router as rest_router
 
 app = FastAPI()
+install_metrics(app)
 app.include_router(graphql_app, prefix="/graphql")
 app.include_router(rest_router)
\ No newline at end of file
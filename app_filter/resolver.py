@@ -1,4 +1,3 @@
-import asyncio
 from pydantic import BaseModel
 from typing import List
 import datetime
@@ -6,7 +5,14 @@ from aiodataloader import DataLoader
 from typing import List, Dict
 from pydantic_resolve import LoaderDepend, ensure_subset
 from fastapi import APIRouter
-from pydantic_resolve import Resolver
+from common.store import TASKS_DB, STORIES_DB, roundtrip
+from common.filters import In, Where
+from common.cache import cached
+from common.coalesce import coalesced
+from common.singleflight import single_flight
+from common.resolver import Resolver
+from common.plan import precompile
+from common.projection import columns
 
 class BaseTask(BaseModel):
     id: int
@@ -25,39 +31,21 @@ class BaseSprint(BaseModel):
     name: str
     start: datetime.datetime
 
-# Mock database for tasks
-TASKS_DB = [
-    {"id": 1, "name": "Task 1", "owner": 201, "done": False, "story_id": 1},
-    {"id": 2, "name": "Task 2", "owner": 202, "done": True, "story_id": 2},
-    {"id": 3, "name": "Task 3", "owner": 203, "done": False, "story_id": 1},
-]
-
-# Mock database for stories
-STORIES_DB = [
-    {"id": 1, "name": "Story 1", "owner": 101, "point": 5, "sprint_id": 1},
-    {"id": 2, "name": "Story 2", "owner": 102, "point": 8, "sprint_id": 1},
-    {"id": 3, "name": "Story 3", "owner": 103, "point": 3, "sprint_id": 2},
-]
 
 class TaskLoader(DataLoader):
+    @cached(invalidate_on=(TASKS_DB, 'story_id'))
+    @coalesced()
     async def batch_load_fn(self, story_ids: List[int]) -> List[List[BaseTask]]:
-        await asyncio.sleep(0.01)  # Simulate async DB call
-        story_id_to_tasks = {sid: [] for sid in story_ids}
-        for t in TASKS_DB:
-            if t["story_id"] in story_id_to_tasks:
-                story_id_to_tasks[t["story_id"]].append(t)
-        return [story_id_to_tasks[sid] for sid in story_ids]
+        await roundtrip()  # Simulate async DB call
+        return TASKS_DB.group_by('story_id', story_ids, columns=columns(self))
 
 class StoryLoader(DataLoader):
     story_ids: List[int]
+    where: Where = ()  # more filters on stories, e.g. (Range('point', 3, 8),)
     async def batch_load_fn(self, sprint_ids: List[int]) -> List[List[BaseStory]]:
-        await asyncio.sleep(0.01)  # Simulate async DB call
-        sprint_id_to_stories = {sid: [] for sid in sprint_ids}
-        for s in STORIES_DB:
-            if s["sprint_id"] in sprint_id_to_stories:
-                if not self.story_ids or s["id"] in self.story_ids:
-                    sprint_id_to_stories[s["sprint_id"]].append(s)
-        return [sprint_id_to_stories[sid] for sid in sprint_ids]
+        await roundtrip()  # Simulate async DB call
+        where = (*self.where, In('id', self.story_ids)) if self.story_ids else self.where
+        return STORIES_DB.group_by('sprint_id', sprint_ids, where=where, columns=columns(self))  # evaluated with the indexes
 
 
 # ---- business model ------
@@ -84,8 +72,10 @@ class Sprint(BaseSprint):
         return stories
 
 router = APIRouter()
+precompile(Sprint)  # resolution plans, see common/plan.py
 
 @router.get('/sprints', response_model=list[Sprint])
+@single_flight(list[Sprint])
 async def get_sprints():
     sprint1 = Sprint(
         id=1,
@@ -1,40 +1,28 @@
-import asyncio
 import datetime
-from typing import List, Dict
+from typing import List
 import strawberry
 from strawberry.dataloader import DataLoader
 from strawberry.fastapi import GraphQLRouter, BaseContext
+from common.store import TASKS_DB, STORIES_DB, roundtrip
+from common.cache import cached
+from common.coalesce import coalesced
+from common.schema import schema_extensions
 from dataclasses import field
 
-# Mock database for tasks
-TASKS_DB = [
-    {"id": 1, "name": "Task 1", "owner": 201, "done": False, "story_id": 1},
-    {"id": 2, "name": "Task 2", "owner": 202, "done": True, "story_id": 2},
-    {"id": 3, "name": "Task 3", "owner": 203, "done": False, "story_id": 1},
-]
-
-# Mock database for stories
-STORIES_DB = [
-    {"id": 1, "name": "Story 1", "owner": 101, "point": 5, "sprint_id": 1},
-    {"id": 2, "name": "Story 2", "owner": 102, "point": 8, "sprint_id": 1},
-    {"id": 3, "name": "Story 3", "owner": 103, "point": 3, "sprint_id": 2},
-]
 
+@cached(invalidate_on=(TASKS_DB, 'story_id'))
+@coalesced()
 async def batch_load_tasks(story_ids: List[int]) -> List[List["Task"]]:
-    await asyncio.sleep(0.01)  # Simulate async DB call
-    story_id_to_tasks: Dict[int, List[Task]] = {sid: [] for sid in story_ids}
-    for t in TASKS_DB:
-        if t["story_id"] in story_id_to_tasks:
-            story_id_to_tasks[t["story_id"]].append(Task(id=t["id"], name=t["name"], owner=t["owner"], done=t["done"]))
-    return [story_id_to_tasks[sid] for sid in story_ids]
+    await roundtrip()  # Simulate async DB call
+    return [[Task(id=t["id"], name=t["name"], owner=t["owner"], done=t["done"]) for t in tasks]
+            for tasks in TASKS_DB.group_by('story_id', story_ids)]
 
+@cached(invalidate_on=(STORIES_DB, 'sprint_id'))
+@coalesced()
 async def batch_load_stories(sprint_ids: List[int]) -> List[List["Story"]]:
-    await asyncio.sleep(0.01)  # Simulate async DB call
-    sprint_id_to_stories: Dict[int, List[Story]] = {sid: [] for sid in sprint_ids}
-    for s in STORIES_DB:
-        if s["sprint_id"] in sprint_id_to_stories:
-            sprint_id_to_stories[s["sprint_id"]].append(Story(id=s["id"], name=s["name"], owner=s["owner"], point=s["point"]))
-    return [sprint_id_to_stories[sid] for sid in sprint_ids]
+    await roundtrip()  # Simulate async DB call
+    return [[Story(id=s["id"], name=s["name"], owner=s["owner"], point=s["point"]) for s in stories]
+            for stories in STORIES_DB.group_by('sprint_id', sprint_ids)]
 
 # Custom context class inheriting from BaseContext
 class CustomContext(BaseContext):
@@ -105,7 +93,7 @@ class Query:
             Tree(id=2, children=[Tree(id=3)])
         ])]
 
-schema = strawberry.Schema(query=Query)
+schema = strawberry.Schema(query=Query, extensions=schema_extensions())
 
 graphql_app = GraphQLRouter(
     schema,
@@ -1,4 +1,4 @@
-import asyncio
+import functools
 from pydantic import BaseModel
 from typing import List
 import datetime
@@ -6,7 +6,16 @@ from aiodataloader import DataLoader
 from typing import List
 from pydantic_resolve import LoaderDepend, ensure_subset
 from fastapi import APIRouter
-from pydantic_resolve import Resolver, Collector, ICollector
+from common.store import Table, STORIES_DB, roundtrip
+from common.cache import cached
+from common.coalesce import coalesced
+from common.singleflight import single_flight
+from common.offload import offloaded
+from common.collectors import Count, group_ratio
+from pydantic_resolve import ICollector
+from common.resolver import Resolver
+from common.plan import precompile
+from common.projection import columns
 from pydantic import Field
 
 class BaseTask(BaseModel):
@@ -26,38 +35,34 @@ class BaseSprint(BaseModel):
     name: str
     start: datetime.datetime
 
-# Mock database for tasks
-TASKS_DB = [
+# Mock database for tasks, task 3 is done here so done_perc is more interesting
+TASKS_DB = Table('tasks', [
     {"id": 1, "name": "Task 1", "owner": 201, "done": False, "story_id": 1},
     {"id": 2, "name": "Task 2", "owner": 202, "done": True, "story_id": 2},
     {"id": 3, "name": "Task 3", "owner": 203, "done": True, "story_id": 1},
-]
-
-# Mock database for stories
-STORIES_DB = [
-    {"id": 1, "name": "Story 1", "owner": 101, "point": 5, "sprint_id": 1},
-    {"id": 2, "name": "Story 2", "owner": 102, "point": 8, "sprint_id": 1},
-    {"id": 3, "name": "Story 3", "owner": 103, "point": 3, "sprint_id": 2},
-]
+], indexes=['story_id'])
 
 class TaskLoader(DataLoader):
+    @cached(invalidate_on=(TASKS_DB, 'story_id'))
+    @coalesced()
     async def batch_load_fn(self, story_ids: List[int]) -> List[List[BaseTask]]:
-        await asyncio.sleep(0.01)  # Simulate async DB call
-        story_id_to_tasks = {sid: [] for sid in story_ids}
-        for t in TASKS_DB:
-            if t["story_id"] in story_id_to_tasks:
-                story_id_to_tasks[t["story_id"]].append(t)
-        return [story_id_to_tasks[sid] for sid in story_ids]
+        await roundtrip()  # Simulate async DB call
+        return TASKS_DB.group_by('story_id', story_ids, columns=columns(self))
 
 class StoryLoader(DataLoader):
+    @cached(invalidate_on=(STORIES_DB, 'sprint_id'))
+    @coalesced()
     async def batch_load_fn(self, sprint_ids: List[int]) -> List[List[BaseStory]]:
-        await asyncio.sleep(0.01)  # Simulate async DB call
-        sprint_id_to_stories = {sid: [] for sid in sprint_ids}
-        for s in STORIES_DB:
-            if s["sprint_id"] in sprint_id_to_stories:
-                sprint_id_to_stories[s["sprint_id"]].append(s)
-        return [sprint_id_to_stories[sid] for sid in sprint_ids]
+        await roundtrip()  # Simulate async DB call
+        return STORIES_DB.group_by('sprint_id', sprint_ids, columns=columns(self))
+
 
+@offloaded(batch=functools.partial(group_ratio, scale=100))  # all stories of a job in one pass
+def done_perc(dones: List[bool]) -> float:
+    if dones:
+        return sum(1 for done in dones if done) / len(dones) * 100
+    else:
+        return 0
 
 @ensure_subset(BaseStory)
 class SimpleStory(BaseModel):  # how to pick fields..
@@ -73,11 +78,7 @@ class SimpleStory(BaseModel):  # how to pick fields..
     
     done_perc: float = 0.0
     def post_done_perc(self):
-        if self.tasks:
-            done_count = sum(1 for task in self.tasks if task.done)
-            return done_count / len(self.tasks) * 100
-        else:
-            return 0
+        return done_perc([task.done for task in self.tasks])  # offloaded with OFFLOAD=thread|process
 
 class TaskCounter(ICollector):
     def __init__(self, alias: str):
@@ -96,16 +97,18 @@ class Sprint(BaseSprint):
         return loader.load(self.id)
     
     task_count: int = 0
-    def post_task_count(self, collector=Collector(alias='task_count', flat=True)):
-        return len(collector.values())  # this can be optimized further
+    def post_task_count(self, collector=Count(alias='task_count')):
+        return collector.values()  # counts while collecting, no flat list of tasks
 
     task_count2: int = 0
     def post_task_count2(self, collector=TaskCounter(alias='task_count2')):
         return collector.values() 
 
 router = APIRouter()
+precompile(Sprint)  # resolution plans, see common/plan.py
 
 @router.get('/sprints', response_model=list[Sprint])
+@single_flight(list[Sprint])
 async def get_sprints():
     sprint1 = Sprint(
         id=1,
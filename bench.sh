@@ -1,14 +1,5 @@
-# echo '------------ base test ------------'
-# ab -c 50 -n 1000 http://localhost:8000/base-test
-
-
-echo '------------ rest + resolver ------------'
-ab -c 50 -n 1000 http://localhost:8000/sprints
-
-
-echo '------------ rest + dc resolver ------------'
-ab -c 50 -n 1000 http://localhost:8000/dc/sprints
-
-
-echo '------------ graphql'------------ 
-ab -c 50 -n 1000 -T "application/json" -p body.json http://localhost:8000/graphql
+# boots app_bench.main with uvicorn on localhost and drives /sprints, /dc/sprints and /graphql,
+# results (p50/p95/p99 latency, rps, cpu time per request) are printed as json.
+# extra options are passed through, eg: sh bench.sh --duration 30 -o run.json
+# see `python -m benchmarks.load --help`
+python -m benchmarks.load --apps app_bench.main --concurrency 50 "$@"
@@ -0,0 +1,55 @@
+"""
+row vs columnar (common/columnar.py) task loader results for /sprints and /dc/sprints
+(app_bench)
+
+    python -m benchmarks.columnar
+    python -m benchmarks.columnar --stories 20 --tasks 500 --iterations 10
+
+the route's endpoint (list[BaseTask] views, the loader returning rows validated into
+BaseTask per row) and the /sprints-columnar endpoint with COLUMNAR on (Columnar[BaseTask]
+views, Rows serialized from the columns) are resolved then encoded with dump_json. modes
+run interleaved and must produce the same JSON (benchmarks/modes.py); each record has the
+p50 resolve and serialize time and the peak traced memory of one resolve + serialize, per
+mode.
+"""
+import inspect
+from typing import Any, Dict
+
+from app_bench import resolver as pydantic_resolver
+from app_bench import resolver_dataclass as dataclass_resolver
+from benchmarks.modes import arguments, compare, flag, peak_kb, restored, run
+from benchmarks.serialize import route
+from common import columnar
+from common.serialize import dump_json
+
+CASES = {
+    '/sprints': pydantic_resolver,
+    '/dc/sprints': dataclass_resolver,
+}
+MODES = {'rows': False, 'columnar': True}
+
+
+async def bench_case(module, iterations: int) -> Dict[str, Any]:
+    routes = {'rows': route(module.router, '/sprints'), 'columnar': route(module.router, '/sprints-columnar')}
+    switch = flag(columnar, 'COLUMNAR_ENABLED')
+    results = await compare(routes, MODES, switch, iterations, serialize=True)
+
+    for mode, enabled in MODES.items():
+        r = routes[mode]
+
+        async def once():
+            dump_json(r.response_model, await inspect.unwrap(r.endpoint)())
+
+        switch(enabled)
+        results[f'{mode}_peak_kb'] = await peak_kb(once)
+    return results
+
+
+def main(argv=None):
+    args = arguments(__doc__, argv, stories=10, tasks=200, iterations=5)
+    with restored(columnar, 'COLUMNAR_ENABLED'):
+        run(args, CASES, bench_case)
+
+
+if __name__ == '__main__':
+    main()
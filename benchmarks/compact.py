@@ -0,0 +1,109 @@
+"""
+memory of resolved trees: pydantic models, pydantic dataclasses and compact slots
+dataclasses (common/compact.py) of app_bench
+
+    python -m benchmarks.compact
+    python -m benchmarks.compact --stories 100 --tasks 50 --iterations 5
+
+each route's endpoint is resolved with tracemalloc on: `retained_kb` is what the resolved
+tree still holds once resolve returns, `peak_kb` the high water mark during resolve. the
+serialized responses must be identical; resolve time is the p50 without tracemalloc.
+"""
+import argparse
+import asyncio
+import gc
+import inspect
+import json
+import statistics
+import time
+import tracemalloc
+from typing import Any, Dict
+
+from app_bench import resolver as pydantic_resolver
+from app_bench import resolver_compact as compact_resolver
+from app_bench import resolver_dataclass as dataclass_resolver
+from benchmarks.dataset import dataset, leaves
+from benchmarks.serialize import route
+from common import store
+from common.serialize import dump_json
+from common.tree import children
+
+CASES = {
+    '/sprints': pydantic_resolver,
+    '/dc/sprints': dataclass_resolver,
+    '/cp/sprints': compact_resolver,
+}
+
+
+def distinct_nodes(roots) -> int:
+    """the roots repeat [sprint1, sprint2], count each object once"""
+    seen = set()
+    stack = list(roots)
+    while stack:
+        current = stack.pop()
+        if isinstance(current, list):
+            stack.extend(current)
+        elif id(current) not in seen and not isinstance(current, (int, str, bool, float)):
+            seen.add(id(current))
+            stack.extend(c for c in children(current) if isinstance(c, list))
+    return len(seen)
+
+
+async def bench_case(module, iterations: int) -> Dict[str, Any]:
+    r = route(module.router, '/sprints')
+    endpoint = inspect.unwrap(r.endpoint)
+
+    samples = []
+    for _ in range(iterations + 1):
+        start = time.perf_counter()
+        result = await endpoint()
+        samples.append(time.perf_counter() - start)
+    body = dump_json(r.response_model, result)
+    del result
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = await endpoint()
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    nodes = distinct_nodes(result)
+    return {
+        'body': body,
+        'nodes': nodes,
+        'resolve_ms': round(statistics.median(samples[1:]) * 1000, 3),
+        'retained_kb': round((retained - before) / 1024, 1),
+        'peak_kb': round((peak - before) / 1024, 1),
+        'bytes_per_node': round((retained - before) / nodes, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stories', type=int, default=50, help='stories per sprint')
+    parser.add_argument('--tasks', type=int, default=20, help='tasks per story')
+    parser.add_argument('--iterations', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    store.DB_LATENCY = 0
+
+    async def run_all():
+        return {path: await bench_case(module, args.iterations) for path, module in CASES.items()}
+
+    with dataset(args.stories, args.tasks):
+        results = asyncio.run(run_all())
+
+    bodies = {result.pop('body') for result in results.values()}
+    assert len(bodies) == 1, 'serialized responses differ'
+
+    meta = {'stories': args.stories, 'tasks': args.tasks, 'leaves': leaves(args.stories, args.tasks),
+            'iterations': args.iterations}
+    print(json.dumps({'meta': meta, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+parametrized mock data for the shared store tables
+
+the routes and `Query.sprints` always return sprint 1 and sprint 2 (x10), so the tree is
+scaled below them: `stories` per sprint and `tasks` per story. tasks=0 gives a two level
+tree (sprints -> stories), otherwise three levels. app_post_process has its own tasks
+table, pass it as `tasks_table`.
+"""
+import contextlib
+from typing import List, Sequence, Tuple
+
+from common.store import STORIES_DB, TASKS_DB, Table
+
+SPRINT_IDS = (1, 2)
+ROOTS = 20  # [sprint1, sprint2] * 10
+
+
+def generate(stories: int, tasks: int, sprint_ids: Sequence[int] = SPRINT_IDS) -> Tuple[List[dict], List[dict]]:
+    story_rows, task_rows = [], []
+    for sprint_id in sprint_ids:
+        for _ in range(stories):
+            story_id = len(story_rows) + 1
+            story_rows.append({"id": story_id, "name": f"Story {story_id}", "owner": 100 + story_id % 100,
+                               "point": story_id % 13, "sprint_id": sprint_id})
+            for _ in range(tasks):
+                task_id = len(task_rows) + 1
+                task_rows.append({"id": task_id, "name": f"Task {task_id}", "owner": 200 + task_id % 100,
+                                  "done": task_id % 3 == 0, "story_id": story_id})
+    return story_rows, task_rows
+
+
+def leaves(stories: int, tasks: int) -> int:
+    """leaf nodes in one /sprints response"""
+    return ROOTS * stories * (tasks or 1)
+
+
+def _fill(table: Table, rows: List[dict]):
+    table.truncate()
+    for row in rows:
+        table.insert(row)
+
+
+@contextlib.contextmanager
+def dataset(stories: int, tasks: int, tasks_table: Table = TASKS_DB, sprint_ids: Sequence[int] = SPRINT_IDS):
+    """swap the shared tables' content for generated rows, restore it on exit"""
+    origin = list(STORIES_DB), list(tasks_table)
+    story_rows, task_rows = generate(stories, tasks, sprint_ids)
+    _fill(STORIES_DB, story_rows)
+    _fill(tasks_table, task_rows)
+    try:
+        yield
+    finally:
+        _fill(STORIES_DB, origin[0])
+        _fill(tasks_table, origin[1])
@@ -0,0 +1,97 @@
+"""
+parsed on every request vs cached documents (common/documents.py), app_bench's schema
+with the body.json query
+
+    python -m benchmarks.documents
+    python -m benchmarks.documents --stories 50 --tasks 20 --iterations 20
+
+`uncached` is the schema without DocumentCacheExtension (GRAPHQL_DOCUMENT_CACHE=false),
+`cached` sends the query, `persisted` only its hash (registered by `cached`),
+interleaved; all must return the same data. parse + validate is a fixed cost per request,
+so the default tree is small. each record has the p50 execute time per mode and the
+saving, plus parse_validate_ms: graphql-core parse + validate of the query alone.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from typing import Any, Dict, List
+
+import strawberry
+from graphql import parse, validate
+
+from app_bench.graphql import CustomContext, Query
+from benchmarks.dataset import dataset, leaves
+from common import store
+from common.documents import DOCUMENT_CACHE, DocumentCacheExtension, query_hash
+from common.schema import schema_extensions
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_schema(cached: bool) -> strawberry.Schema:
+    """app_bench's schema with or without the document cache, whatever GRAPHQL_DOCUMENT_CACHE says"""
+    extensions = [extension for extension in schema_extensions() if extension is not DocumentCacheExtension]
+    return strawberry.Schema(query=Query, extensions=[DocumentCacheExtension, *extensions] if cached else extensions)
+
+
+async def bench(body: Dict[str, Any], iterations: int) -> Dict[str, Any]:
+    query, operation_name = body['query'], body.get('operationName')
+    persisted = {'persistedQuery': {'version': 1, 'sha256Hash': query_hash(query)}}
+    uncached, cached = make_schema(False), make_schema(True)
+    modes = {
+        'uncached': (uncached, query, None),
+        'cached': (cached, query, None),
+        'persisted': (cached, None, persisted),
+    }
+    samples: Dict[str, List[float]] = {mode: [] for mode in modes}
+    data = {}
+    for i in range(iterations + 1):
+        for mode, (mode_schema, mode_query, extensions) in modes.items():
+            start = time.perf_counter()
+            result = await mode_schema.execute(mode_query, context_value=CustomContext(), operation_name=operation_name,
+                                               operation_extensions=extensions)
+            if i:  # first round warms up
+                samples[mode].append(time.perf_counter() - start)
+            assert not result.errors, result.errors
+            data[mode] = result.data
+    assert data['uncached'] == data['cached'] == data['persisted'], 'cached result differs'
+
+    results: Dict[str, Any] = {f'{mode}_ms': round(statistics.median(values) * 1000, 3)
+                               for mode, values in samples.items()}
+    results['saved_ms'] = round(results['uncached_ms'] - results['cached_ms'], 3)
+    results['speedup'] = round(results['uncached_ms'] / results['cached_ms'], 2)
+
+    graphql_schema = uncached._schema
+    parse_validate = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        validate(graphql_schema, parse(query))
+        parse_validate.append(time.perf_counter() - start)
+    results['parse_validate_ms'] = round(statistics.median(parse_validate) * 1000, 3)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stories', type=int, default=2, help='stories per sprint')
+    parser.add_argument('--tasks', type=int, default=3, help='tasks per story')
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    with open(os.path.join(ROOT, 'body.json')) as f:
+        body = json.load(f)
+
+    store.DB_LATENCY = 0
+    with dataset(args.stories, args.tasks):
+        results = asyncio.run(bench(body, args.iterations))
+
+    meta = {'stories': args.stories, 'tasks': args.tasks, 'leaves': leaves(args.stories, args.tasks),
+            'iterations': args.iterations, 'cache': DOCUMENT_CACHE.stats()}
+    print(json.dumps({'meta': meta, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+filters checked per row in the loader vs pushed into the store (common/filters.py)
+
+    python -m benchmarks.filters
+    python -m benchmarks.filters --stories 1000 --selected 10 --iterations 20
+
+the story table is filled with `stories` stories per sprint, a batch of both sprints is
+loaded keeping `selected` story ids (In) and a point range (Range): `python` filters the
+whole groups the way app_filter's StoryLoader used to, `where` passes the filters to
+STORIES_DB.group_by. both must return the same rows; p50 per batch.
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import Any, Dict, List
+
+from benchmarks.dataset import SPRINT_IDS, dataset
+from common.filters import In, Range
+from common.store import STORIES_DB
+
+
+def python_filter(story_ids: List[int], low: int, high: int) -> List[List[dict]]:
+    ids = set(story_ids)
+    return [[s for s in stories if s['id'] in ids and low <= s['point'] <= high]
+            for stories in STORIES_DB.group_by('sprint_id', list(SPRINT_IDS))]
+
+
+def where_filter(story_ids: List[int], low: int, high: int) -> List[List[dict]]:
+    return STORIES_DB.group_by('sprint_id', list(SPRINT_IDS), where=(In('id', story_ids), Range('point', low, high)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stories', type=int, default=5000, help='stories per sprint')
+    parser.add_argument('--selected', type=int, default=20, help='story ids kept')
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    candidates = {'python': python_filter, 'where': where_filter}
+    samples: Dict[str, List[float]] = {mode: [] for mode in candidates}
+    with dataset(args.stories, 0):
+        story_ids = list(range(1, args.stories * len(SPRINT_IDS) + 1, max(args.stories * len(SPRINT_IDS) // args.selected, 1)))
+        results = {}
+        for i in range(args.iterations + 1):
+            for mode, load in candidates.items():
+                start = time.perf_counter()
+                results[mode] = load(story_ids, 3, 8)
+                if i:  # first round warms up
+                    samples[mode].append(time.perf_counter() - start)
+    assert results['python'] == results['where'], 'filtered rows differ'
+
+    report: Dict[str, Any] = {f'{mode}_ms': round(statistics.median(values) * 1000, 3) for mode, values in samples.items()}
+    report['speedup'] = round(report['python_ms'] / report['where_ms'], 2)
+    report['rows'] = sum(len(rows) for rows in results['where'])
+    meta = {'stories': args.stories, 'selected': len(story_ids), 'iterations': args.iterations}
+    print(json.dumps({'meta': meta, 'results': report}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
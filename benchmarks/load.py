@@ -0,0 +1,419 @@
+"""
+HTTP load benchmark for the demo apps, replaces the `ab` calls in bench.sh
+
+    python -m benchmarks.load
+    python -m benchmarks.load --apps app_bench.main --concurrency 50 --warmup 2 --duration 10 -o run.json
+
+each app is booted with uvicorn in a subprocess on a free localhost port (or driven
+in-process through ASGI with `--mode inprocess`), every target is hit by `concurrency`
+keep-alive connections, and p50/p95/p99 latency, RPS and server CPU time per request
+are emitted as JSON so runs can be diffed across commits.
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import hashlib
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+with open(os.path.join(ROOT, 'body.json'), 'rb') as f:
+    GRAPHQL_BODY = f.read()
+
+# app_filter requires the `ids` argument on Sprint.stories
+FILTER_GRAPHQL_BODY = json.dumps({
+    'query': '{ sprints { id name start stories(ids: [1, 2, 3]) { id name point tasks { done id name owner } } } }'
+}).encode()
+
+
+def persisted(body: bytes) -> Tuple[bytes, bytes]:
+    """hash-only and query + hash bodies of a GraphQL request (persisted query, common/documents.py)"""
+    payload = json.loads(body)
+    payload['extensions'] = {'persistedQuery': {
+        'version': 1, 'sha256Hash': hashlib.sha256(payload['query'].encode()).hexdigest()}}
+    register = json.dumps(payload).encode()
+    del payload['query']
+    return json.dumps(payload).encode(), register
+
+
+PERSISTED_GRAPHQL_BODY, REGISTER_GRAPHQL_BODY = persisted(GRAPHQL_BODY)
+
+# hash-only body -> query + hash body, sent when the server doesn't know the hash (yet)
+REGISTER_BODIES = {PERSISTED_GRAPHQL_BODY: REGISTER_GRAPHQL_BODY}
+
+# (name, method, path, body)
+Target = Tuple[str, str, str, Optional[bytes]]
+
+TARGETS: Dict[str, List[Target]] = {
+    'app.main': [
+        ('rest', 'GET', '/sprints', None),
+        ('rest-dataclass', 'GET', '/dc/sprints', None),
+        ('rest-strawberry', 'GET', '/sb/sprints', None),
+        ('graphql', 'POST', '/graphql', GRAPHQL_BODY),
+        ('graphql-persisted', 'POST', '/graphql', PERSISTED_GRAPHQL_BODY),
+    ],
+    'app_bench.main': [
+        ('rest', 'GET', '/sprints', None),
+        ('rest-dataclass', 'GET', '/dc/sprints', None),
+        ('rest-compact', 'GET', '/cp/sprints', None),
+        ('graphql', 'POST', '/graphql', GRAPHQL_BODY),
+        ('graphql-persisted', 'POST', '/graphql', PERSISTED_GRAPHQL_BODY),
+    ],
+    'app_filter.main': [
+        ('rest', 'GET', '/sprints', None),
+        ('graphql', 'POST', '/graphql', FILTER_GRAPHQL_BODY),
+    ],
+    'app_post_process.main': [
+        ('rest', 'GET', '/sprints', None),
+        ('graphql', 'POST', '/graphql', GRAPHQL_BODY),
+    ],
+}
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """nearest-rank percentile"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(p / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(latencies: List[float], errors: int, duration: float, cpu: Optional[float]) -> Dict[str, Any]:
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        'requests': count,
+        'errors': errors,
+        'rps': round(count / duration, 2) if duration else 0,
+        'latency_ms': {
+            'p50': round(percentile(values, 50) * 1000, 3),
+            'p95': round(percentile(values, 95) * 1000, 3),
+            'p99': round(percentile(values, 99) * 1000, 3),
+            'mean': round(sum(values) / count * 1000, 3) if count else 0,
+            'max': round(values[-1] * 1000, 3) if count else 0,
+        },
+        'cpu_ms_per_request': round(cpu / count * 1000, 3) if cpu is not None and count else None,
+    }
+
+
+# ---- transports ------
+
+class HttpConnection:
+    """minimal HTTP/1.1 keep-alive client, enough for localhost benchmarking"""
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, body: Optional[bytes]) -> Tuple[int, bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        head = f'{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n'
+        if body is not None:
+            head += f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n'
+        self.writer.write(head.encode() + b'\r\n' + (body or b''))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        content = b''
+        if 'content-length' in headers:
+            content = await self.reader.readexactly(int(headers['content-length']))
+        elif headers.get('transfer-encoding') == 'chunked':
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                content += (await self.reader.readexactly(size + 2))[:-2]
+                if size == 0:
+                    break
+
+        if headers.get('connection') == 'close':
+            await self.close()
+        return status, content
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+class AsgiConnection:
+    """call the ASGI app directly, no socket involved"""
+    def __init__(self, app):
+        self.app = app
+        self.first_body_at: Optional[float] = None  # perf_counter of the last request's first body bytes
+
+    async def request(self, method: str, path: str, body: Optional[bytes]) -> Tuple[int, bytes]:
+        path, _, query = path.partition('?')
+        headers = [(b'host', b'benchmark')]
+        if body is not None:
+            headers += [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+            'query_string': query.encode(), 'root_path': '', 'headers': headers,
+            'client': ('127.0.0.1', 0), 'server': ('127.0.0.1', 80),
+        }
+        sent = False
+        status = 0
+        content = b''
+        self.first_body_at = None
+
+        async def receive():
+            nonlocal sent
+            if sent:
+                await asyncio.Event().wait()  # nothing more to send, wait for cancellation
+            sent = True
+            return {'type': 'http.request', 'body': body or b'', 'more_body': False}
+
+        async def send(message):
+            nonlocal status, content
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                if self.first_body_at is None and message.get('body'):
+                    self.first_body_at = time.perf_counter()
+                content += message.get('body', b'')
+
+        await self.app(scope, receive, send)
+        return status, content
+
+    async def close(self):
+        pass
+
+
+class Lifespan:
+    """run lifespan startup/shutdown for the in-process app"""
+    def __init__(self, app):
+        self.app = app
+        self.first_body_at: Optional[float] = None  # perf_counter of the last request's first body bytes
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.replies: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Future] = None
+
+    async def _send_and_wait(self, event: str):
+        await self.queue.put({'type': f'lifespan.{event}'})
+        waiter = asyncio.ensure_future(self.replies.get())
+        await asyncio.wait([self.task, waiter], return_when=asyncio.FIRST_COMPLETED)
+        if not waiter.done():  # app does not support lifespan
+            waiter.cancel()
+
+    async def startup(self):
+        async def send(message):
+            await self.replies.put(message)
+
+        scope = {'type': 'lifespan', 'asgi': {'version': '3.0'}, 'state': {}}
+        self.task = asyncio.ensure_future(self.app(scope, self.queue.get, send))
+        await self._send_and_wait('startup')
+
+    async def shutdown(self):
+        if not self.task.done():
+            await self._send_and_wait('shutdown')
+        await asyncio.gather(self.task, return_exceptions=True)
+
+
+# ---- server process ------
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def process_cpu_seconds(pid: int) -> Optional[float]:
+    """utime + stime of a process, linux only"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def start_server(module: str, port: int, env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', f'{module}:app',
+         '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning', '--no-access-log'],
+        cwd=ROOT, env={**os.environ, **env})
+
+
+async def wait_until_ready(port: int, proc: subprocess.Popen, timeout: float = 20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'server exited with code {proc.returncode}')
+        try:
+            conn = HttpConnection('127.0.0.1', port)
+            await conn.request('GET', '/openapi.json', None)
+            await conn.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError('server did not start in time')
+
+
+# ---- driver ------
+
+async def drive(make_connection, target: Target, concurrency: int, warmup: float, duration: float, cpu_clock):
+    _, method, path, body = target
+    latencies: List[float] = []
+    errors = 0
+    measuring = False
+    stop = False
+
+    async def worker():
+        nonlocal errors
+        conn = make_connection()
+        try:
+            while not stop:
+                start = time.perf_counter()
+                counted = measuring
+                try:
+                    status, content = await conn.request(method, path, body)
+                    if body in REGISTER_BODIES and b'PERSISTED_QUERY_NOT_FOUND' in content:
+                        status, content = await conn.request(method, path, REGISTER_BODIES[body])
+                    # graphql reports failures with 200 + errors
+                    ok = status < 400 and b'"errors":' not in content
+                except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+                    await conn.close()
+                    ok = False
+                if counted and not stop:
+                    if ok:
+                        latencies.append(time.perf_counter() - start)
+                    else:
+                        errors += 1
+        finally:
+            await conn.close()
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+    await asyncio.sleep(warmup)
+
+    measuring = True
+    cpu_start = cpu_clock()
+    started = time.perf_counter()
+    await asyncio.sleep(duration)
+    stop = True
+    elapsed = time.perf_counter() - started
+    cpu_end = cpu_clock()
+
+    await asyncio.gather(*workers)
+    cpu = cpu_end - cpu_start if cpu_start is not None and cpu_end is not None else None
+    return summarize(latencies, errors, elapsed, cpu)
+
+
+async def bench_app(module: str, args) -> List[Dict[str, Any]]:
+    targets = [t for t in TARGETS[module] if not args.targets or t[0] in args.targets]
+    results = []
+
+    if args.mode == 'subprocess':
+        port = free_port()
+        proc = start_server(module, port, dict(args.env))
+        try:
+            await wait_until_ready(port, proc)
+            for target in targets:
+                summary = await drive(
+                    lambda: HttpConnection('127.0.0.1', port), target,
+                    args.concurrency, args.warmup, args.duration,
+                    lambda: process_cpu_seconds(proc.pid))
+                results.append({'app': module, 'target': target[0], 'path': target[2], **summary})
+        finally:
+            proc.terminate()
+            proc.wait()
+    else:
+        os.environ.update(dict(args.env))
+        app = __import__(module, fromlist=['app']).app
+        lifespan = Lifespan(app)
+        await lifespan.startup()
+        try:
+            for target in targets:
+                # client and server share the process, so cpu time covers both
+                summary = await drive(
+                    lambda: AsgiConnection(app), target,
+                    args.concurrency, args.warmup, args.duration,
+                    time.process_time)
+                results.append({'app': module, 'target': target[0], 'path': target[2], **summary})
+        finally:
+            await lifespan.shutdown()
+    return results
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_env(value: str) -> Tuple[str, str]:
+    key, _, val = value.partition('=')
+    return key, val
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--apps', default=','.join(TARGETS), help='comma separated app modules')
+    parser.add_argument('--targets', default='', help='comma separated target names, eg: rest,graphql')
+    parser.add_argument('--mode', choices=['subprocess', 'inprocess'], default='subprocess')
+    parser.add_argument('-c', '--concurrency', type=int, default=50)
+    parser.add_argument('--warmup', type=float, default=2, help='seconds')
+    parser.add_argument('--duration', type=float, default=10, help='seconds')
+    parser.add_argument('--env', type=parse_env, action='append', default=[], help='KEY=VALUE passed to the app')
+    parser.add_argument('-o', '--output', help='write json here instead of stdout')
+    args = parser.parse_args(argv)
+    args.targets = [t for t in args.targets.split(',') if t]
+
+    if args.mode == 'inprocess' and ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    async def run():
+        results = []
+        for module in args.apps.split(','):
+            results.extend(await bench_app(module, args))
+        return results
+
+    # keep stdout clean for the report, in-process apps may print
+    with contextlib.redirect_stdout(sys.stderr):
+        results = asyncio.run(run())
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'mode': args.mode,
+            'concurrency': args.concurrency,
+            'warmup': args.warmup,
+            'duration': args.duration,
+            'env': dict(args.env),
+        },
+        'results': results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""
+in-process micro benchmark, isolates the resolver walk from uvicorn / HTTP
+
+    python -m benchmarks.micro
+    python -m benchmarks.micro --n 100 --latency 0 --iterations 50
+
+calls `Resolver().resolve([sprint1, sprint2] * N)` for app_bench/resolver.py and
+app_bench/resolver_dataclass.py, and strawberry's `schema.execute` for app_bench/graphql.py,
+directly in an event loop. per iteration it reports:
+
+- loader: time spent inside batch load functions (includes the simulated DB latency)
+- traversal: the rest of the resolve / execute wall time (walk, validation, resolve methods)
+- post: time spent in post methods (resolver only)
+- serialize: json encoding of the resolved models as the route does it (see
+  common/serialize.py), or json encoding of the GraphQL result
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import json
+import os
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+import common.store as store
+from common.resolver import Resolver
+from common.serialize import dump_json
+from app_bench import graphql as gql
+from app_bench import resolver as pydantic_resolver
+from app_bench import resolver_dataclass as dataclass_resolver
+
+PHASES = ('loader', 'traversal', 'post', 'serialize')
+
+with open(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'body.json')) as f:
+    GRAPHQL_QUERY = json.load(f)['query']
+
+
+class Phases:
+    def __init__(self):
+        self.values = dict.fromkeys(PHASES, 0.0)
+
+    @contextlib.contextmanager
+    def measure(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.values[phase] += time.perf_counter() - start
+
+
+class PhaseResolver(Resolver):
+    """Resolver which accumulates time spent in post methods"""
+    def __init__(self, phases: Phases, **kwargs):
+        super().__init__(**kwargs)
+        self.phases = phases
+
+    def _execute_post_method(self, *args, **kwargs):
+        with self.phases.measure('post'):
+            return super()._execute_post_method(*args, **kwargs)
+
+    def _execute_post_default_handler(self, *args, **kwargs):
+        with self.phases.measure('post'):
+            return super()._execute_post_default_handler(*args, **kwargs)
+
+
+def timed_batch(fn: Callable, get_phases: Callable[[], Phases]):
+    async def wrapper(*args):
+        with get_phases().measure('loader'):
+            return await fn(*args)
+    return wrapper
+
+
+@contextlib.contextmanager
+def patched(obj, name: str, value):
+    origin = getattr(obj, name)
+    setattr(obj, name, value)
+    try:
+        yield
+    finally:
+        setattr(obj, name, origin)
+
+
+def response_model(router, path: str):
+    for route in router.routes:
+        if route.path == path:
+            return route.response_model
+    raise KeyError(path)
+
+
+def resolver_case(module, n: int):
+    model = response_model(module.router, '/sprints')
+    current = Phases()
+
+    async def run() -> Dict[str, float]:
+        nonlocal current
+        current = phases = Phases()
+        sprint1 = module.Sprint(id=1, name="Sprint 1", start=datetime.datetime(2025, 6, 12))
+        sprint2 = module.Sprint(id=2, name="Sprint 2", start=datetime.datetime(2025, 7, 1))
+
+        start = time.perf_counter()
+        result = await PhaseResolver(phases).resolve([sprint1, sprint2] * n)
+        total = time.perf_counter() - start
+
+        with phases.measure('serialize'):
+            dump_json(model, result)
+
+        phases.values['traversal'] = total - phases.values['loader'] - phases.values['post']
+        return phases.values
+
+    stack = contextlib.ExitStack()
+    for loader in (module.TaskLoader, module.StoryLoader):
+        stack.enter_context(patched(loader, 'batch_load_fn', timed_batch(loader.batch_load_fn, lambda: current)))
+    return run, stack
+
+
+def graphql_query(n: int) -> str:
+    """
+    Query.sprints always returns 20 roots, so scale the fan-out by aliasing it
+    n // 10 times in one document, loaders are still shared by the whole execution
+    """
+    selection = GRAPHQL_QUERY[GRAPHQL_QUERY.index('sprints'):GRAPHQL_QUERY.rindex('}')]
+    copies = max(n // 10, 1)
+    return '{ ' + ' '.join(f's{i}: {selection}' for i in range(copies)) + ' }'
+
+
+def graphql_case(n: int):
+    query = graphql_query(n)
+    current = Phases()
+
+    async def run() -> Dict[str, float]:
+        nonlocal current
+        current = phases = Phases()
+
+        start = time.perf_counter()
+        result = await gql.schema.execute(query, context_value=gql.CustomContext())
+        total = time.perf_counter() - start
+        assert result.errors is None, result.errors
+
+        with phases.measure('serialize'):
+            json.dumps({'data': result.data})
+
+        phases.values['traversal'] = total - phases.values['loader']
+        return phases.values
+
+    stack = contextlib.ExitStack()
+    for name in ('batch_load_tasks', 'batch_load_stories'):
+        stack.enter_context(patched(gql, name, timed_batch(getattr(gql, name), lambda: current)))
+    return run, stack
+
+
+async def bench(run, iterations: int, warmup: int) -> Dict[str, Any]:
+    for _ in range(warmup):
+        await run()
+
+    samples: List[Dict[str, float]] = [await run() for _ in range(iterations)]
+    totals = [sum(s.values()) for s in samples]
+    return {
+        'iterations': iterations,
+        'total_ms': {
+            'mean': round(statistics.mean(totals) * 1000, 3),
+            'p50': round(statistics.median(totals) * 1000, 3),
+            'min': round(min(totals) * 1000, 3),
+        },
+        'phases_ms': {p: round(statistics.mean(s[p] for s in samples) * 1000, 3) for p in PHASES},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n', type=int, default=10, help='roots are [sprint1, sprint2] * N, use a multiple of 10 to match the graphql case')
+    parser.add_argument('--latency', type=float, default=store.DB_LATENCY, help='simulated DB latency in seconds, 0 to disable')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--cases', default='resolver,dataclass,graphql')
+    args = parser.parse_args(argv)
+
+    store.DB_LATENCY = args.latency
+    cases = {
+        'resolver': lambda: resolver_case(pydantic_resolver, args.n),
+        'dataclass': lambda: resolver_case(dataclass_resolver, args.n),
+        'graphql': lambda: graphql_case(args.n),
+    }
+
+    async def run_all():
+        results = {}
+        for name in args.cases.split(','):
+            run, stack = cases[name]()
+            with stack:
+                results[name] = await bench(run, args.iterations, args.warmup)
+        return results
+
+    report = {
+        'meta': {'n': args.n, 'latency': args.latency, 'roots': args.n * 2},
+        'results': asyncio.run(run_all()),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+shared scaffold of the route benchmarks comparing modes of one feature (columnar,
+trusted, plan, projection)
+
+a benchmark declares its modes (name -> value handed to a switch function) and its
+cases, `compare` resolves a route's endpoint once per mode, interleaved so machine noise
+hits them alike, the first round warms up, and every mode must encode the same JSON:
+
+    async def bench_case(module, iterations):
+        r = route(module.router, '/sprints')
+        return await compare(r, {'scanned': False, 'planned': True}, flag(plan, 'PLAN_ENABLED'), iterations)
+
+    def main(argv=None):
+        args = arguments(__doc__, argv, stories=2, tasks=3, iterations=50)
+        with restored(plan, 'PLAN_ENABLED'):
+            run(args, CASES, bench_case)
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import inspect
+import json
+import statistics
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Union
+
+from fastapi.routing import APIRoute
+
+from benchmarks.dataset import dataset, leaves
+from common import store
+from common.serialize import dump_json
+from common.store import TASKS_DB, Table
+
+
+def p50_ms(values: List[float]) -> float:
+    return round(statistics.median(values) * 1000, 3)
+
+
+def flag(module: Any, name: str) -> Callable[[Any], None]:
+    """switch setting a module global, eg: flag(plan, 'PLAN_ENABLED')"""
+    return lambda value: setattr(module, name, value)
+
+
+@contextlib.contextmanager
+def restored(module: Any, name: str) -> Iterator[None]:
+    """put a module global switched by the benchmark back"""
+    value = getattr(module, name)
+    try:
+        yield
+    finally:
+        setattr(module, name, value)
+
+
+async def compare(r: Union[APIRoute, Dict[str, APIRoute]], modes: Dict[str, Any], switch: Callable[[Any], None],
+                  iterations: int, serialize: bool = False) -> Dict[str, Any]:
+    """
+    p50 resolve time of the route's endpoint per mode ({mode}_ms), with `serialize` the
+    dump_json time ({mode}_serialize_ms) and the body size too. `r` is one route, or a
+    route per mode when the modes are served by different views
+    """
+    routes = r if isinstance(r, dict) else dict.fromkeys(modes, r)
+    samples: Dict[str, Dict[str, List[float]]] = {mode: {'resolve': [], 'serialize': []} for mode in modes}
+    bodies = {}
+    for i in range(iterations + 1):
+        for mode, value in modes.items():
+            switch(value)
+            start = time.perf_counter()
+            result = await inspect.unwrap(routes[mode].endpoint)()
+            resolved = time.perf_counter()
+            bodies[mode] = dump_json(routes[mode].response_model, result)
+            if i:  # first round warms up
+                samples[mode]['resolve'].append(resolved - start)
+                samples[mode]['serialize'].append(time.perf_counter() - resolved)
+    first, *others = modes
+    for mode in others:
+        assert bodies[mode] == bodies[first], f'{mode} output differs'
+
+    results: Dict[str, Any] = {'bytes': len(bodies[first])} if serialize else {}
+    for mode, phases in samples.items():
+        results[f'{mode}_ms'] = p50_ms(phases['resolve'])
+        if serialize:
+            results[f'{mode}_serialize_ms'] = p50_ms(phases['serialize'])
+    return results
+
+
+async def peak_kb(fn: Callable[[], Awaitable[Any]]) -> float:
+    """peak traced memory while awaiting fn()"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        await fn()
+        return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+
+def arguments(doc: str, argv: Optional[List[str]], stories: int, tasks: int, iterations: int) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=doc, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stories', type=int, default=stories, help='stories per sprint')
+    parser.add_argument('--tasks', type=int, default=tasks, help='tasks per story')
+    parser.add_argument('--iterations', type=int, default=iterations)
+    return parser.parse_args(argv)
+
+
+def run(args: argparse.Namespace, cases: Dict[str, Any], bench_case: Callable[[Any, int], Awaitable[Dict[str, Any]]],
+        tasks_table: Callable[[Any], Table] = lambda case: TASKS_DB):
+    """bench_case(case, iterations) of every case on generated rows, prints the JSON report"""
+    store.DB_LATENCY = 0
+
+    async def run_all():
+        results = {}
+        for name, case in cases.items():
+            with dataset(args.stories, args.tasks, tasks_table=tasks_table(case)):
+                results[name] = await bench_case(case, args.iterations)
+        return results
+
+    results = asyncio.run(run_all())
+    meta = {'stories': args.stories, 'tasks': args.tasks, 'leaves': leaves(args.stories, args.tasks),
+            'iterations': args.iterations}
+    print(json.dumps({'meta': meta, 'results': results}, indent=2))
@@ -0,0 +1,95 @@
+"""
+throughput of app_post_process under concurrency, post processing inline vs offloaded
+
+    python -m benchmarks.offload
+    python -m benchmarks.offload --stories 20 --tasks 100 --concurrency 1,10 --modes off,batch,thread,process
+
+fills the stories table and app_post_process' own tasks table with benchmarks.dataset,
+then drives `/sprints` in-process through ASGI with `concurrency` workers for every
+common.offload mode. besides RPS and latency, each record has the p99 / max delay of a
+timer ticking on the event loop meanwhile (how long other requests wait behind post
+methods) and how many offloaded calls were sent per pool job.
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List
+
+import common.store as store
+from benchmarks.dataset import dataset, leaves
+from benchmarks.load import AsgiConnection, Lifespan, drive, percentile
+from common.offload import OFFLOADER
+
+TICK = 0.005
+
+
+async def loop_lag(samples: List[float]):
+    """delay of a TICK timer, until cancelled"""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        samples.append(time.perf_counter() - start - TICK)
+
+
+async def measure(app, mode: str, concurrency: int, args) -> Dict[str, Any]:
+    OFFLOADER.mode = mode
+    calls, batches = OFFLOADER.calls, OFFLOADER.batches
+    samples: List[float] = []
+    lag = asyncio.ensure_future(loop_lag(samples))
+    try:
+        result = await drive(lambda: AsgiConnection(app), ('rest', 'GET', '/sprints', None),
+                             concurrency, args.warmup, args.duration, time.process_time)
+    finally:
+        lag.cancel()
+    samples.sort()
+    calls, batches = OFFLOADER.calls - calls, OFFLOADER.batches - batches
+    return {
+        'mode': mode,
+        'concurrency': concurrency,
+        **result,
+        'loop_lag_ms': {'p99': round(percentile(samples, 99) * 1000, 3),
+                        'max': round(samples[-1] * 1000, 3) if samples else 0},
+        'calls_per_job': round(calls / batches, 1) if batches else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stories', type=int, default=5, help='stories per sprint')
+    parser.add_argument('--tasks', type=int, default=20, help='tasks per story')
+    parser.add_argument('--concurrency', default='1,4', help='comma separated worker counts')
+    parser.add_argument('--modes', default='off,batch,thread,process', help='comma separated OFFLOAD modes')
+    parser.add_argument('--latency', type=float, default=store.DB_LATENCY, help='simulated DB latency in seconds, 0 to disable')
+    parser.add_argument('--warmup', type=float, default=1)
+    parser.add_argument('--duration', type=float, default=5)
+    args = parser.parse_args(argv)
+
+    from app_post_process.main import app
+    from app_post_process.resolver import TASKS_DB
+    store.DB_LATENCY = args.latency
+    modes = args.modes.split(',')
+    concurrencies = [int(c) for c in args.concurrency.split(',')]
+
+    async def run() -> List[Dict[str, Any]]:
+        lifespan = Lifespan(app)
+        await lifespan.startup()
+        try:
+            return [await measure(app, mode, c, args) for c in concurrencies for mode in modes]
+        finally:
+            await lifespan.shutdown()
+            OFFLOADER.shutdown()
+
+    with dataset(args.stories, args.tasks, tasks_table=TASKS_DB):
+        results = asyncio.run(run())
+
+    report = {
+        'meta': {'stories': args.stories, 'tasks': args.tasks, 'leaves': leaves(args.stories, args.tasks),
+                 'latency': args.latency, 'workers': OFFLOADER.workers, 'duration': args.duration},
+        'results': results,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
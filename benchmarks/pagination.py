@@ -0,0 +1,116 @@
+"""
+per parent pages (common/pagination.py) vs loading every child and slicing
+
+    python -m benchmarks.pagination
+    python -m benchmarks.pagination --stories 5 --tasks 20000 --limit 10 --iterations 5
+    python -m benchmarks.pagination --group-sizes 1000,100000,1000000
+
+store: a batch of every story id, `sliced` is group_by then [offset:offset + limit] per
+story, `paged` is TASKS_DB.page_by, `cursor` a page_by continuing after the middle task of
+the first story; totals are len(group_by) vs count_by. graphql: app's schema for all tasks of
+every story vs `taskCount tasks(first: limit)`. results must match; p50 per call.
+cursor_scaling: one group of each size in a table of its own, a cursor page from its
+middle (us per page), the cost must not grow with the group.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+from app.graphql import CustomContext, schema
+from benchmarks.dataset import SPRINT_IDS, dataset
+from common import store
+from common.pagination import Page
+from common.store import STORIES_DB, TASKS_DB, Table
+
+ALL_TASKS = '{ sprints { stories { id tasks { id name owner done } } } }'
+PAGED_TASKS = '{ sprints { stories { id taskCount tasks(first: %d) { id name owner done } } } }'
+
+
+def p50(fn: Callable[[], Any], iterations: int) -> float:
+    samples = []
+    for i in range(iterations + 1):
+        start = time.perf_counter()
+        fn()
+        if i:  # first round warms up
+            samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 3)
+
+
+def bench_store(limit: int, iterations: int) -> Dict[str, Any]:
+    story_ids = [story['id'] for story in STORIES_DB]
+    offset = 5
+    sliced = [tasks[offset:offset + limit] for tasks in TASKS_DB.group_by('story_id', story_ids)]
+    assert TASKS_DB.page_by('story_id', story_ids, Page(limit, offset)) == sliced, 'page differs'
+    middles = [tasks[len(tasks) // 2]['id'] for tasks in TASKS_DB.group_by('story_id', story_ids[:1])]
+    assert TASKS_DB.count_by('story_id', story_ids) == [len(t) for t in TASKS_DB.group_by('story_id', story_ids)]
+
+    return {
+        'sliced_ms': p50(lambda: [tasks[offset:offset + limit]
+                                  for tasks in TASKS_DB.group_by('story_id', story_ids)], iterations),
+        'paged_ms': p50(lambda: TASKS_DB.page_by('story_id', story_ids, Page(limit, offset)), iterations),
+        'cursor_ms': p50(lambda: TASKS_DB.page_by('story_id', story_ids[:1], Page(limit, after=middles[0])),
+                         iterations),
+        'count_all_ms': p50(lambda: [len(t) for t in TASKS_DB.group_by('story_id', story_ids)], iterations),
+        'count_by_ms': p50(lambda: TASKS_DB.count_by('story_id', story_ids), iterations),
+    }
+
+
+def bench_cursor_scaling(sizes: List[int], limit: int, iterations: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for size in sizes:
+        table = Table('tasks', ({'id': i, 'story_id': 1} for i in range(size)), indexes=['story_id'])
+        page = Page(limit, after=size // 2)
+        assert [row['id'] for row in table.page_by('story_id', [1], page)[0]] == list(range(size // 2 + 1, size // 2 + 1 + limit))
+        # ms per 1000 pages: us per page
+        results[f'{size}_us'] = p50(lambda: [table.page_by('story_id', [1], page) for _ in range(1000)], iterations)
+    return results
+
+
+def bench_graphql(limit: int, iterations: int) -> Dict[str, Any]:
+    def execute(query: str) -> Dict[str, Any]:
+        result = asyncio.run(schema.execute(query, context_value=CustomContext()))
+        assert not result.errors, result.errors
+        return result.data
+
+    full, paged = execute(ALL_TASKS), execute(PAGED_TASKS % limit)
+    for full_sprint, paged_sprint in zip(full['sprints'], paged['sprints']):
+        for full_story, paged_story in zip(full_sprint['stories'], paged_sprint['stories']):
+            assert paged_story['tasks'] == full_story['tasks'][:limit], 'graphql page differs'
+            assert paged_story['taskCount'] == len(full_story['tasks'])
+
+    return {
+        'all_tasks_ms': p50(lambda: execute(ALL_TASKS), iterations),
+        'paged_ms': p50(lambda: execute(PAGED_TASKS % limit), iterations),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stories', type=int, default=2, help='stories per sprint')
+    parser.add_argument('--tasks', type=int, default=5000, help='tasks per story')
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--iterations', type=int, default=3)
+    parser.add_argument('--group-sizes', default='1000,10000,100000', help='comma separated, cursor_scaling')
+    args = parser.parse_args(argv)
+
+    store.DB_LATENCY = 0
+    with dataset(args.stories, args.tasks):
+        results = {'store': bench_store(args.limit, args.iterations),
+                   'graphql': bench_graphql(args.limit, args.iterations)}
+    for section in results.values():
+        baseline, paged = next(iter(section.values())), section['paged_ms']
+        section['speedup'] = round(baseline / paged, 1)
+    sizes = [int(size) for size in args.group_sizes.split(',')]
+    scaling = results['cursor_scaling'] = bench_cursor_scaling(sizes, args.limit, args.iterations)
+    scaling['growth'] = round(scaling[f'{sizes[-1]}_us'] / scaling[f'{sizes[0]}_us'], 2)
+
+    meta = {'stories': args.stories * len(SPRINT_IDS), 'tasks': args.tasks, 'limit': args.limit,
+            'iterations': args.iterations}
+    print(json.dumps({'meta': meta, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+batching of (sprint id, story ids) keys: PartitionedLoader (common/partition.py) vs one
+backend call per key, the only correct option for a plain batch function that assumes a
+single argument set per batch
+
+    python -m benchmarks.partition
+    python -m benchmarks.partition --sprints 500 --filters 5 --latency 10
+
+`sprints` sprints load their stories, spread over `filters` distinct story id filters,
+all in the same tick (like the fields of one GraphQL response). both modes must return
+the same stories, the partitioned one with exactly one backend batch per filter. each
+record has the backend calls, the wall time and the CPU time per load round (p50).
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Dict, List, Tuple
+
+from strawberry.dataloader import DataLoader
+
+from app_filter.graphql import batch_load_stories_with_filter
+from benchmarks.dataset import dataset
+from common import store
+from common.partition import PartitionedLoader, canonical
+
+
+class Counter:
+    """batch_load_stories_with_filter counting its calls and keys"""
+    def __init__(self):
+        self.calls = 0
+        self.keys = 0
+
+    async def __call__(self, ids, sprint_ids):
+        self.calls += 1
+        self.keys += len(sprint_ids)
+        return await batch_load_stories_with_filter(ids, sprint_ids)
+
+
+def make_loaders(counter: Counter) -> Dict[str, DataLoader]:
+    async def per_key(pairs):
+        (sprint_id, ids), = pairs
+        return await counter(canonical(ids), [sprint_id])
+
+    return {'per_key': DataLoader(load_fn=per_key, max_batch_size=1, cache_key_fn=canonical),
+            'partitioned': PartitionedLoader(load_fn=counter)}
+
+
+async def run_round(mode: str, keys: List[Tuple[int, list]]) -> Tuple[Any, Dict[str, Any]]:
+    counter = Counter()
+    loader = make_loaders(counter)[mode]
+    wall, cpu = time.perf_counter(), time.process_time()
+    stories = await asyncio.gather(*[loader.load(key) for key in keys])
+    timing = {'wall': time.perf_counter() - wall, 'cpu': time.process_time() - cpu}
+    return [[s.id for s in group] for group in stories], {'calls': counter.calls, 'keys': counter.keys, **timing}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sprints', type=int, default=200)
+    parser.add_argument('--stories', type=int, default=10, help='stories per sprint')
+    parser.add_argument('--filters', type=int, default=3, help='distinct story id filters')
+    parser.add_argument('--latency', type=float, default=5, help='simulated DB round trip, ms')
+    parser.add_argument('--iterations', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    store.DB_LATENCY = args.latency / 1000
+    sprint_ids = list(range(1, args.sprints + 1))
+    # filter i keeps every (i + 2)th story of the table
+    filters = [list(range(1, args.sprints * args.stories + 1, i + 2)) for i in range(args.filters)]
+    keys = [(sprint_id, filters[i % args.filters]) for i, sprint_id in enumerate(sprint_ids)]
+
+    async def run_all():
+        samples: Dict[str, List[Dict[str, Any]]] = {'per_key': [], 'partitioned': []}
+        results = {}
+        for i in range(args.iterations + 1):
+            for mode in samples:
+                results[mode], stats = await run_round(mode, keys)
+                if i:  # first round warms up
+                    samples[mode].append(stats)
+        assert results['per_key'] == results['partitioned'], 'partitioned results differ'
+        return samples
+
+    with dataset(args.stories, 0, sprint_ids=sprint_ids):
+        samples = asyncio.run(run_all())
+
+    report = {}
+    for mode, rounds in samples.items():
+        report[mode] = {
+            'backend_calls': rounds[0]['calls'],
+            'keys_per_call': round(rounds[0]['keys'] / rounds[0]['calls'], 1),
+            'wall_ms': round(statistics.median(r['wall'] for r in rounds) * 1000, 3),
+            'cpu_ms': round(statistics.median(r['cpu'] for r in rounds) * 1000, 3),
+        }
+    assert report['partitioned']['backend_calls'] == args.filters, 'expected one batch per filter'
+
+    meta = {'sprints': args.sprints, 'stories': args.stories, 'filters': args.filters,
+            'latency_ms': args.latency, 'iterations': args.iterations}
+    print(json.dumps({'meta': meta, 'results': report}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
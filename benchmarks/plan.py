@@ -0,0 +1,47 @@
+"""
+scanned vs planned (common/plan.py) resolves of /sprints, /dc/sprints and /cp/sprints
+(app_bench)
+
+    python -m benchmarks.plan
+    python -m benchmarks.plan --stories 50 --tasks 20 --iterations 20
+
+the route's endpoint is resolved with the model graph scanned on every call
+(RESOLVE_PLAN off) and with the cached plan, interleaved; both must serialize to the
+same JSON (benchmarks/modes.py). the scan is a fixed cost per request, so the default
+tree is small. each record has the p50 resolve time per mode, the saving, and the plan's
+one off compile time.
+"""
+from typing import Any, Dict
+
+from app_bench import resolver as pydantic_resolver
+from app_bench import resolver_compact as compact_resolver
+from app_bench import resolver_dataclass as dataclass_resolver
+from benchmarks.modes import arguments, compare, flag, restored, run
+from benchmarks.serialize import route
+from common import plan
+
+CASES = {
+    '/sprints': (pydantic_resolver, pydantic_resolver.Sprint),
+    '/dc/sprints': (dataclass_resolver, dataclass_resolver.Sprint),
+    '/cp/sprints': (compact_resolver, compact_resolver.CompactSprint),
+}
+MODES = {'scanned': False, 'planned': True}
+
+
+async def bench_case(case, iterations: int) -> Dict[str, Any]:
+    module, root = case
+    results = await compare(route(module.router, '/sprints'), MODES, flag(plan, 'PLAN_ENABLED'), iterations)
+    results['saved_ms'] = round(results['scanned_ms'] - results['planned_ms'], 3)
+    results['speedup'] = round(results['scanned_ms'] / results['planned_ms'], 2)
+    results['plan'] = plan.get_plan(root).stats()
+    return results
+
+
+def main(argv=None):
+    args = arguments(__doc__, argv, stories=2, tasks=3, iterations=50)
+    with restored(plan, 'PLAN_ENABLED'):
+        run(args, CASES, bench_case)
+
+
+if __name__ == '__main__':
+    main()
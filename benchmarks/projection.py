@@ -0,0 +1,67 @@
+"""
+whole vs projected (common/projection.py) loader rows for /sprints of app, app (dataclass
+views), app_filter and app_post_process
+
+    python -m benchmarks.projection
+    python -m benchmarks.projection --stories 100 --tasks 20 --iterations 10
+
+the route's endpoint is resolved with FIELD_PROJECTION off and on, interleaved; both must
+serialize to the same JSON (benchmarks/modes.py). each record has the p50 resolve time,
+the peak traced memory during one resolve and the row cells (columns x rows) the loaders
+returned, per mode.
+"""
+import datetime
+from typing import Any, Dict
+
+from app import resolver as app_resolver
+from app import resolver_dataclass as app_dataclass_resolver
+from app_filter import resolver as filter_resolver
+from app_post_process import resolver as post_process_resolver
+from benchmarks.modes import arguments, compare, flag, peak_kb, restored, run
+from benchmarks.serialize import route
+from common import projection
+from common.store import TASKS_DB
+
+# route module, tasks table, loader params
+CASES = {
+    'app /sprints': (app_resolver, TASKS_DB, None),
+    'app /dc/sprints': (app_dataclass_resolver, TASKS_DB, None),
+    'app_filter /sprints': (filter_resolver, TASKS_DB, {filter_resolver.StoryLoader: {'story_ids': [1, 2, 3]}}),
+    'app_post_process /sprints': (post_process_resolver, post_process_resolver.TASKS_DB, None),
+}
+MODES = {'whole': False, 'projected': True}
+
+
+def cells(loaders) -> int:
+    """row cells held by the loaders' caches"""
+    total = 0
+    for loader in loaders:
+        for future in loader._cache.values():
+            total += sum(len(row) for row in future.result())
+    return total
+
+
+async def bench_case(case, iterations: int) -> Dict[str, Any]:
+    module, _, loader_params = case
+    switch = flag(projection, 'PROJECTION_ENABLED')
+    results = await compare(route(module.router, '/sprints'), MODES, switch, iterations)
+
+    for mode, enabled in MODES.items():
+        switch(enabled)
+        resolver = module.Resolver(loader_params=loader_params)
+        roots = [module.Sprint(id=sprint_id, name=f'Sprint {sprint_id}', start=datetime.datetime(2025, 6, 12))
+                 for sprint_id in (1, 2)]
+        results[f'{mode}_peak_kb'] = await peak_kb(lambda: resolver.resolve(roots))
+        results[f'{mode}_cells'] = cells(resolver.loader_instance_cache.values())
+    results['speedup'] = round(results['whole_ms'] / results['projected_ms'], 2)
+    return results
+
+
+def main(argv=None):
+    args = arguments(__doc__, argv, stories=50, tasks=20, iterations=5)
+    with restored(projection, 'PROJECTION_ENABLED'):
+        run(args, CASES, bench_case, tasks_table=lambda case: case[1])
+
+
+if __name__ == '__main__':
+    main()
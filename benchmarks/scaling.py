@@ -0,0 +1,158 @@
+"""
+scaling benchmark, resolver vs GraphQL over growing trees
+
+    python -m benchmarks.scaling
+    python -m benchmarks.scaling --stories 1,10,50 --tasks 0,1,10,100 --latency 0 -o scaling.json --plot scaling.png
+
+for every (stories per sprint, tasks per story) point the shared tables are filled by
+benchmarks.dataset, then app.main's `/sprints`, `/dc/sprints`, `/sb/sprints` and the
+GraphQL `sprints { stories { tasks } }` query are called in-process through ASGI.
+each record has the median latency, the peak traced memory of one request and the
+response size; `crossovers` lists the leaf counts where a target changes from faster
+to slower than `/sprints` (or back).
+"""
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+import common.store as store
+from benchmarks.dataset import dataset, leaves
+from benchmarks.load import TARGETS, AsgiConnection, Lifespan
+
+BASELINE = 'rest'
+
+
+async def measure(conn: AsgiConnection, target, iterations: int) -> Dict[str, Any]:
+    _, method, path, body = target
+    status, content = await conn.request(method, path, body)  # warm up
+    assert status == 200 and b'"errors":' not in content, content[:200]
+
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await conn.request(method, path, body)
+        latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        await conn.request(method, path, body)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'latency_ms': round(statistics.median(latencies) * 1000, 3),
+        'peak_memory_kb': round(peak / 1024, 1),
+        'response_kb': round(len(content) / 1024, 1),
+    }
+
+
+def crossovers(records: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+    """leaf counts where a target flips between faster and slower than the baseline"""
+    by_shape: Dict[tuple, Dict[str, float]] = {}
+    for r in records:
+        by_shape.setdefault((r['leaves'], r['stories'], r['tasks']), {})[r['target']] = r['latency_ms']
+
+    result: Dict[str, List[int]] = {}
+    previous: Dict[str, bool] = {}
+    for (leaf_count, _, _), latencies in sorted(by_shape.items()):
+        for target, latency in latencies.items():
+            if target == BASELINE:
+                continue
+            slower = latency > latencies[BASELINE]
+            if target in previous and previous[target] != slower:
+                result.setdefault(target, []).append(leaf_count)
+            previous[target] = slower
+    return result
+
+
+def plot(records: List[Dict[str, Any]], path: str):
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        raise SystemExit('--plot requires matplotlib, pip install matplotlib')
+
+    fig, (ax_latency, ax_memory) = plt.subplots(1, 2, figsize=(12, 5))
+    for target in sorted({r['target'] for r in records}):
+        points = sorted((r['leaves'], r['latency_ms'], r['peak_memory_kb']) for r in records if r['target'] == target)
+        ax_latency.plot([p[0] for p in points], [p[1] for p in points], marker='o', label=target)
+        ax_memory.plot([p[0] for p in points], [p[2] for p in points], marker='o', label=target)
+
+    for ax, label in ((ax_latency, 'median latency (ms)'), (ax_memory, 'peak memory (KB)')):
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.set_xlabel('leaf nodes')
+        ax.set_ylabel(label)
+        ax.legend()
+    fig.tight_layout()
+    fig.savefig(path)
+
+
+def int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(',') if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stories', type=int_list, default=[1, 10, 50], help='stories per sprint')
+    parser.add_argument('--tasks', type=int_list, default=[0, 1, 10, 100], help='tasks per story, 0 for a two level tree')
+    parser.add_argument('--targets', default='', help='comma separated, default: all of app.main')
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=store.DB_LATENCY, help='simulated DB latency in seconds')
+    parser.add_argument('-o', '--output', help='write json here instead of stdout')
+    parser.add_argument('--plot', help='save latency / memory curves to this image, requires matplotlib')
+    args = parser.parse_args(argv)
+
+    store.DB_LATENCY = args.latency
+    from app.main import app
+
+    names = [t for t in args.targets.split(',') if t]
+    targets = [t for t in TARGETS['app.main'] if not names or t[0] in names or t[0] == BASELINE]
+
+    async def run():
+        records = []
+        conn = AsgiConnection(app)
+        lifespan = Lifespan(app)
+        await lifespan.startup()
+        try:
+            for stories, tasks in itertools.product(args.stories, args.tasks):
+                with dataset(stories, tasks):
+                    for target in targets:
+                        result = await measure(conn, target, args.iterations)
+                        records.append({'target': target[0], 'stories': stories, 'tasks': tasks,
+                                        'leaves': leaves(stories, tasks), **result})
+                        print(json.dumps(records[-1]), file=sys.stderr)
+        finally:
+            await lifespan.shutdown()
+        return records
+
+    with contextlib.redirect_stdout(sys.stderr):
+        records = asyncio.run(run())
+
+    report = {
+        'meta': {'latency': args.latency, 'iterations': args.iterations, 'baseline': BASELINE},
+        'records': records,
+        'crossovers': crossovers(records),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.plot:
+        plot(records, args.plot)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+response serialization of /sprints, /dc/sprints (app_bench) and /sb/sprints (app)
+
+    python -m benchmarks.serialize
+    python -m benchmarks.serialize --stories 100 --tasks 10 --iterations 50
+
+the route's endpoint resolves the tree once per case, then it is encoded with:
+
+- jsonable: validate against response_model, dump to python then json.dumps via
+  JSONResponse (a plain APIRouter on FastAPI versions without the dump_json fast path)
+- response_model: validate against response_model then dump_json (a plain APIRouter on
+  recent FastAPI)
+- dump_json: encode the resolved models directly (common/serialize.py, what the response
+  cache, single flight and streamed responses do)
+
+candidates run interleaved so machine noise hits them alike, all must produce the same JSON.
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from app import resolver_strawberry_type as strawberry_resolver
+from app_bench import resolver as pydantic_resolver
+from app_bench import resolver_dataclass as dataclass_resolver
+from benchmarks.dataset import dataset, leaves
+from common import store
+from common.serialize import dump_json
+
+CASES = {
+    '/sprints': pydantic_resolver,
+    '/dc/sprints': dataclass_resolver,
+    '/sb/sprints': strawberry_resolver,
+}
+
+
+def route(router, path: str):
+    for r in router.routes:
+        if r.path == path:
+            return r
+    raise KeyError(path)
+
+
+def summary(samples: List[float]) -> Dict[str, float]:
+    return {
+        'mean': round(statistics.mean(samples) * 1000, 3),
+        'p50': round(statistics.median(samples) * 1000, 3),
+        'min': round(min(samples) * 1000, 3),
+    }
+
+
+async def bench_case(module, iterations: int, warmup: int) -> Dict[str, Any]:
+    r = route(module.router, '/sprints')
+    result = await inspect.unwrap(r.endpoint)()
+
+    async def jsonable():
+        return JSONResponse(await serialize_response(field=r.response_field, response_content=result)).body
+
+    async def validated():
+        return await serialize_response(field=r.response_field, response_content=result, dump_json=True)
+
+    async def direct():
+        return dump_json(r.response_model, result)
+
+    candidates: Dict[str, Callable] = {'jsonable': jsonable, 'response_model': validated, 'dump_json': direct}
+    body = await direct()
+    for name, fn in candidates.items():
+        assert json.loads(await fn()) == json.loads(body), f'{name} output differs'
+
+    samples: Dict[str, List[float]] = {name: [] for name in candidates}
+    for i in range(warmup + iterations):
+        for name, fn in candidates.items():
+            start = time.perf_counter()
+            await fn()
+            if i >= warmup:
+                samples[name].append(time.perf_counter() - start)
+
+    results: Dict[str, Any] = {'bytes': len(body)}
+    results.update({f'{name}_ms': summary(values) for name, values in samples.items()})
+    p50 = results['dump_json_ms']['p50']
+    results['speedup'] = {name: round(results[f'{name}_ms']['p50'] / p50, 2) if p50 else None
+                          for name in ('jsonable', 'response_model')}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stories', type=int, default=None, help='stories per sprint, default: the built-in mock data')
+    parser.add_argument('--tasks', type=int, default=10, help='tasks per story, used with --stories')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    store.DB_LATENCY = 0
+
+    async def run_all():
+        return {path: await bench_case(module, args.iterations, args.warmup) for path, module in CASES.items()}
+
+    if args.stories is None:
+        results = asyncio.run(run_all())
+        meta = {'dataset': 'builtin'}
+    else:
+        with dataset(args.stories, args.tasks):
+            results = asyncio.run(run_all())
+        meta = {'stories': args.stories, 'tasks': args.tasks, 'leaves': leaves(args.stories, args.tasks)}
+
+    print(json.dumps({'meta': {**meta, 'iterations': args.iterations}, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+streaming vs buffered resolver routes
+
+    python -m benchmarks.stream
+    python -m benchmarks.stream --stories 100 --tasks 20 --chunks 1,4,10 --latency 0
+
+fills the shared tables with benchmarks.dataset, then calls app_bench.main in-process
+through ASGI: `/sprints` (whole tree resolved, then serialized) against
+`/sprints-stream` in ndjson and array format for every chunk size. each record has
+the median time to first byte, the median total time and the peak traced memory of
+one request.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+import common.store as store
+from benchmarks.dataset import dataset, leaves
+from benchmarks.load import AsgiConnection, Lifespan
+
+
+def paths(chunks: List[int]) -> List[str]:
+    result = ['/sprints']
+    for chunk in chunks:
+        result += [f'/sprints-stream?chunk={chunk}', f'/sprints-stream?chunk={chunk}&format=array']
+    return result
+
+
+async def measure(conn: AsgiConnection, path: str, iterations: int) -> Dict[str, Any]:
+    status, content = await conn.request('GET', path, None)  # warm up
+    assert status == 200, content[:200]
+
+    first_byte, total = [], []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await conn.request('GET', path, None)
+        total.append(time.perf_counter() - start)
+        first_byte.append(conn.first_body_at - start)
+
+    tracemalloc.start()
+    try:
+        await conn.request('GET', path, None)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'path': path,
+        'first_byte_ms': round(statistics.median(first_byte) * 1000, 3),
+        'total_ms': round(statistics.median(total) * 1000, 3),
+        'peak_memory_kb': round(peak / 1024, 1),
+        'response_kb': round(len(content) / 1024, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stories', type=int, default=50, help='stories per sprint')
+    parser.add_argument('--tasks', type=int, default=10, help='tasks per story')
+    parser.add_argument('--chunks', default='1,4,10', help='comma separated chunk sizes (roots per chunk)')
+    parser.add_argument('--latency', type=float, default=store.DB_LATENCY, help='simulated DB latency in seconds, 0 to disable')
+    parser.add_argument('--iterations', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    from app_bench.main import app
+    store.DB_LATENCY = args.latency
+    chunks = [int(c) for c in args.chunks.split(',')]
+
+    async def run() -> List[Dict[str, Any]]:
+        lifespan = Lifespan(app)
+        await lifespan.startup()
+        try:
+            conn = AsgiConnection(app)
+            return [await measure(conn, path, args.iterations) for path in paths(chunks)]
+        finally:
+            await lifespan.shutdown()
+
+    with dataset(args.stories, args.tasks):
+        results = asyncio.run(run())
+
+    report = {
+        'meta': {'stories': args.stories, 'tasks': args.tasks, 'leaves': leaves(args.stories, args.tasks),
+                 'latency': args.latency, 'iterations': args.iterations},
+        'results': results,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+validated vs constructed (common/trusted.py) nodes for /sprints, /dc/sprints and
+/cp/sprints (app_bench)
+
+    python -m benchmarks.trusted
+    python -m benchmarks.trusted --stories 100 --tasks 20 --iterations 10
+
+the route's endpoint is resolved with its loaders' rows validated (the default) and
+constructed (the loaders marked @trusted for the run), interleaved; both must serialize
+to the same JSON (benchmarks/modes.py). each record has the p50 resolve time per mode and
+the speedup, and the same for the conversion step alone: every task row into the route's
+task class.
+"""
+import time
+from typing import Any, Dict, List
+
+from app_bench import resolver as pydantic_resolver
+from app_bench import resolver_compact as compact_resolver
+from app_bench import resolver_dataclass as dataclass_resolver
+from benchmarks.modes import arguments, compare, p50_ms, run
+from benchmarks.serialize import route
+from common import trusted
+from common.compact import compact
+from common.serialize import type_adapter
+from common.store import TASKS_DB
+
+# route module, task class, loader module
+CASES = {
+    '/sprints': (pydantic_resolver, pydantic_resolver.BaseTask, pydantic_resolver),
+    '/dc/sprints': (dataclass_resolver, dataclass_resolver.BaseTask, dataclass_resolver),
+    '/cp/sprints': (compact_resolver, compact(pydantic_resolver.BaseTask), pydantic_resolver),
+}
+MODES = {'validated': False, 'constructed': True}
+
+
+def mark_trusted(loader_module, on: bool):
+    for loader in (loader_module.TaskLoader, loader_module.StoryLoader):
+        if on:
+            trusted.trusted(loader)
+        elif '__trusted__' in vars(loader):
+            del loader.__trusted__
+
+
+def bench_conversion(task_type, iterations: int) -> Dict[str, Any]:
+    rows = list(TASKS_DB)
+    candidates = {'validated': type_adapter(List[task_type]).validate_python,
+                  'constructed': trusted.constructor(List[task_type])}
+    samples: Dict[str, List[float]] = {mode: [] for mode in candidates}
+    for i in range(iterations + 1):
+        for mode, convert in candidates.items():
+            start = time.perf_counter()
+            convert(rows)
+            if i:
+                samples[mode].append(time.perf_counter() - start)
+    results: Dict[str, Any] = {'rows': len(rows)}
+    results.update({f'{mode}_ms': p50_ms(values) for mode, values in samples.items()})
+    results['speedup'] = round(results['validated_ms'] / results['constructed_ms'], 2)
+    return results
+
+
+async def bench_case(case, iterations: int) -> Dict[str, Any]:
+    module, task_type, loader_module = case
+    results = await compare(route(module.router, '/sprints'), MODES,
+                            lambda on: mark_trusted(loader_module, on), iterations)
+    results['speedup'] = round(results['validated_ms'] / results['constructed_ms'], 2)
+    results['conversion'] = bench_conversion(task_type, iterations)
+    return results
+
+
+def main(argv=None):
+    args = arguments(__doc__, argv, stories=50, tasks=20, iterations=5)
+    try:
+        run(args, CASES, bench_case)
+    finally:
+        for _, _, loader_module in CASES.values():
+            mark_trusted(loader_module, False)
+
+
+if __name__ == '__main__':
+    main()
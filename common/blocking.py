@@ -0,0 +1,174 @@
+"""
+event loop lag monitor and blocking call detector
+
+post methods (post_done_perc), collectors (TaskCounter.add) and the code of batch_load_fn
+between two awaits run synchronously on the event loop, every concurrent request waits
+for them. with BLOCKING_DETECT=true:
+
+- every synchronous slice of a resolve_* / post_* method, collector add, batch load
+  function (common.resolver.Resolver) and strawberry field resolver / DataLoader load_fn
+  (BlockingExtension) is timed, slices longer than BLOCKING_THRESHOLD_MS (default 20) are
+  logged as `module.Model.field` + duration and counted in blocking_calls_total {callable}
+- LagMonitor (started by common.metrics.install) samples the loop lag every
+  METRICS_LAG_INTERVAL_MS and logs spikes over the threshold, along with the slowest
+  slice seen since the previous sample
+
+    WARNING common.blocking: app_post_process.resolver.SimpleStory.post_done_perc held the event loop for 35.2ms
+"""
+import asyncio
+import logging
+import os
+import time
+from inspect import iscoroutine
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from strawberry.extensions import SchemaExtension
+
+from common.metrics import EVENT_LOOP_LAG, LAG_INTERVAL, METRICS, METRICS_ENABLED
+from common.trace import class_label, context_loaders, loader_name
+
+BLOCKING_ENABLED = os.getenv('BLOCKING_DETECT', 'false').lower() == 'true'
+BLOCKING_THRESHOLD = float(os.getenv('BLOCKING_THRESHOLD_MS', '20')) / 1000
+
+logger = logging.getLogger(__name__)
+
+BLOCKING_CALLS = METRICS.counter('blocking_calls_total', 'synchronous slices longer than BLOCKING_THRESHOLD_MS', ('callable',))
+
+# slowest slice since the last lag sample, (name, seconds)
+_slowest: List[Tuple[str, float]] = []
+
+
+def check(name: str, elapsed: float, threshold: float = BLOCKING_THRESHOLD):
+    if not _slowest or elapsed > _slowest[0][1]:
+        _slowest[:] = [(name, elapsed)]
+    if elapsed > threshold:
+        BLOCKING_CALLS.inc(callable=name)
+        logger.warning('%s held the event loop for %.1fms', name, elapsed * 1000)
+
+
+class Sliced:
+    """await a coroutine, timing each step it runs between two suspensions"""
+    __slots__ = ('name', 'coro')
+
+    def __init__(self, name: str, coro):
+        self.name = name
+        self.coro = coro
+
+    def __await__(self):
+        value, error = None, None
+        while True:
+            start = time.perf_counter()
+            try:
+                yielded = self.coro.send(value) if error is None else self.coro.throw(error)
+            except StopIteration as stop:
+                check(self.name, time.perf_counter() - start)
+                return stop.value
+            except BaseException:
+                check(self.name, time.perf_counter() - start)
+                raise
+            check(self.name, time.perf_counter() - start)
+
+            try:
+                value, error = (yield yielded), None
+            except GeneratorExit:
+                self.coro.close()
+                raise
+            except BaseException as e:
+                value, error = None, e
+
+
+async def sliced(name: str, coro) -> Any:
+    """coroutine wrapper, callers (pydantic_resolve, strawberry) check for coroutines"""
+    return await Sliced(name, coro)
+
+
+def timed(name: str, fn: Callable, *args, **kwargs) -> Any:
+    """call fn, a coroutine result is sliced"""
+    start = time.perf_counter()
+    value = fn(*args, **kwargs)
+    check(name, time.perf_counter() - start)
+    return sliced(name, value) if iscoroutine(value) else value
+
+
+def instrument_loader(loader: Any, name: str):
+    """slice the batch function of an aiodataloader or strawberry DataLoader instance"""
+    attr = 'load_fn' if hasattr(loader, 'load_fn') else 'batch_load_fn'
+    batch_fn = getattr(loader, attr)
+
+    def sliced_batch(keys):
+        return sliced(name, batch_fn(keys))
+
+    setattr(loader, attr, sliced_batch)
+
+
+class BlockingMixin:
+    """slices resolve / post / collector / batch load calls, mixed into common.resolver.Resolver"""
+    async def resolve(self, node):
+        self._blocking_loaders = False
+        return await super().resolve(node)
+
+    def _instrument_blocking_loaders(self):
+        # loader instances are created in resolve(), before the first resolve method runs
+        if not self._blocking_loaders:
+            self._blocking_loaders = True
+            for path, loader in self.loader_instance_cache.items():
+                instrument_loader(loader, path)
+
+    def _execute_resolve_method(self, kls, field, method):
+        if not BLOCKING_ENABLED:
+            return super()._execute_resolve_method(kls, field, method)
+        self._instrument_blocking_loaders()
+        return timed(f'{class_label(kls)}.{field}', super()._execute_resolve_method, kls, field, method)
+
+    def _execute_post_method(self, node, kls, kls_path, field, method):
+        if not BLOCKING_ENABLED:
+            return super()._execute_post_method(node, kls, kls_path, field, method)
+        self._instrument_blocking_loaders()
+        return timed(f'{class_label(kls)}.{field}', super()._execute_post_method, node, kls, kls_path, field, method)
+
+    def _execute_post_default_handler(self, node, kls, kls_path, method):
+        if not BLOCKING_ENABLED:
+            return super()._execute_post_default_handler(node, kls, kls_path, method)
+        return timed(f'{class_label(kls)}.{method.__name__}', super()._execute_post_default_handler,
+                     node, kls, kls_path, method)
+
+    def _add_values_into_collectors(self, node, kls):
+        if not BLOCKING_ENABLED:
+            return super()._add_values_into_collectors(node, kls)
+        return timed(f'{class_label(kls)}.<collectors>', super()._add_values_into_collectors, node, kls)
+
+
+class BlockingExtension(SchemaExtension):
+    """strawberry counterpart of BlockingMixin, fields are reported as Type.field"""
+    def on_operation(self) -> Iterator[None]:
+        for loader in context_loaders(self.execution_context.context):
+            instrument_loader(loader, loader_name(loader))
+        yield
+
+    def resolve(self, _next, root, info, *args, **kwargs):
+        return timed(f'{info.parent_type.name}.{info.field_name}', _next, root, info, *args, **kwargs)
+
+
+class LagMonitor:
+    """sleeps `interval` in a loop, oversleeping is time the loop was busy elsewhere"""
+    def __init__(self, interval: float = LAG_INTERVAL, threshold: float = BLOCKING_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.task: Optional[asyncio.Task] = None
+
+    def ensure_started(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def run(self):
+        while True:
+            _slowest.clear()
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(time.perf_counter() - start - self.interval, 0.0)
+
+            if METRICS_ENABLED:
+                EVENT_LOOP_LAG.observe(lag)
+            if BLOCKING_ENABLED and lag > self.threshold:
+                culprit = f', slowest instrumented slice: {_slowest[0][0]} {_slowest[0][1] * 1000:.1f}ms' if _slowest else ''
+                logger.warning('event loop lagged %.1fms%s', lag * 1000, culprit)
@@ -0,0 +1,200 @@
+"""
+process wide result cache shared by DataLoaders of different requests
+
+TaskLoader / StoryLoader (resolver) and the strawberry DataLoaders are created per request,
+so their own cache only dedups keys within one request. decorating a batch function with
+`@cached(...)` lets concurrent and later requests reuse results per key:
+
+    class TaskLoader(DataLoader):
+        @cached(invalidate_on=(TASKS_DB, 'story_id'))
+        async def batch_load_fn(self, story_ids): ...
+
+    @cached(invalidate_on=(TASKS_DB, 'story_id'))
+    async def batch_load_tasks(story_ids): ...
+
+it is opt-in, set LOADER_CACHE=true to enable it.
+only loaders whose result depends on the keys alone should be cached (not the ones
+configured by loader_params). hits, misses, evictions, expirations and invalidations are
+counted per loader in common.metrics (loader_cache_*_total {loader}).
+"""
+import functools
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from common.metrics import METRICS
+from common.store import Table
+
+_MISSING = object()
+
+HITS = METRICS.counter('loader_cache_hits_total', 'keys served from the loader cache', ('loader',))
+MISSES = METRICS.counter('loader_cache_misses_total', 'keys passed on to the batch function, expired ones included', ('loader',))
+EVICTIONS = METRICS.counter('loader_cache_evictions_total', 'entries dropped to stay within LOADER_CACHE_SIZE', ('loader',))
+EXPIRATIONS = METRICS.counter('loader_cache_expirations_total', 'entries found past their ttl', ('loader',))
+INVALIDATIONS = METRICS.counter('loader_cache_invalidations_total', 'entries dropped by invalidate()', ('loader',))
+
+
+def _weight(value: Any) -> int:
+    """size of an entry, rows for list results"""
+    return max(len(value), 1) if isinstance(value, (list, tuple)) else 1
+
+
+class LoaderCache:
+    """
+    LRU bounded by total size (sum of entry weights), entries expire after
+    the ttl of the loader which stored them.
+    """
+    def __init__(self, max_size: int, default_ttl: float, enabled: bool = False):
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.enabled = enabled
+
+        # (loader name, key) -> (expires at, weight, value)
+        self._entries: 'OrderedDict[Tuple[str, Hashable], Tuple[float, int, Any]]' = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self.size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, name: str, key: Hashable) -> Any:
+        """return the cached value or _MISSING"""
+        entry = self._entries.get((name, key))
+        if entry is None:
+            self.misses += 1
+            MISSES.inc(loader=name)
+            return _MISSING
+
+        expires_at, weight, value = entry
+        if expires_at < time.monotonic():
+            self._remove((name, key))
+            self.expirations += 1
+            self.misses += 1
+            EXPIRATIONS.inc(loader=name)
+            MISSES.inc(loader=name)
+            return _MISSING
+
+        self._entries.move_to_end((name, key))
+        self.hits += 1
+        HITS.inc(loader=name)
+        return value
+
+    def set(self, name: str, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        weight = _weight(value)
+        if weight > self.max_size:
+            return
+
+        self._remove((name, key))
+        self._entries[(name, key)] = (time.monotonic() + ttl, weight, value)
+        self.size += weight
+
+        while self.size > self.max_size:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+            EVICTIONS.inc(loader=oldest[0])
+
+    def _remove(self, entry_key):
+        entry = self._entries.pop(entry_key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def version(self, name: str) -> int:
+        return self._versions.get(name, 0)
+
+    def invalidate(self, name: str, key: Hashable = _MISSING):
+        """drop one key of a loader, or all of its keys when key is omitted"""
+        # results being loaded while invalidating must not be stored
+        self._versions[name] = self.version(name) + 1
+
+        if key is not _MISSING:
+            if (name, key) in self._entries:
+                self._remove((name, key))
+                self.invalidations += 1
+                INVALIDATIONS.inc(loader=name)
+            return
+
+        for entry_key in [k for k in self._entries if k[0] == name]:
+            self._remove(entry_key)
+            self.invalidations += 1
+            INVALIDATIONS.inc(loader=name)
+
+    def clear(self):
+        self._entries.clear()
+        self._versions.clear()
+        self.size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'entries': len(self._entries),
+            'size': self.size,
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+        }
+
+
+LOADER_CACHE = LoaderCache(
+    max_size=int(os.getenv('LOADER_CACHE_SIZE', '100000')),
+    default_ttl=float(os.getenv('LOADER_CACHE_TTL', '60')),
+    enabled=os.getenv('LOADER_CACHE', 'false').lower() == 'true')
+
+
+def cached(
+        ttl: Optional[float] = None,
+        invalidate_on: Optional[Tuple[Table, str]] = None,
+        name: Optional[str] = None,
+        cache: LoaderCache = LOADER_CACHE) -> Callable:
+    """
+    decorate a batch load function (keys as the last positional argument),
+    keys found in the cache are not passed to it.
+
+    invalidate_on=(table, column): when a row of table changes, the entry keyed
+    by row[column] is dropped.
+    """
+    def decorator(fn):
+        loader_name = name or f'{fn.__module__}.{fn.__qualname__}'
+
+        if invalidate_on is not None:
+            table, column = invalidate_on
+            table.subscribe(lambda row: cache.invalidate(loader_name) if row is None
+                            else cache.invalidate(loader_name, row[column]))
+
+        @functools.wraps(fn)
+        async def wrapper(*args):
+            if not cache.enabled:
+                return await fn(*args)
+
+            *head, keys = args
+            results = {}
+            missing = []
+            for key in keys:
+                value = cache.get(loader_name, key)
+                if value is _MISSING:
+                    missing.append(key)
+                else:
+                    results[key] = value
+
+            if missing:
+                version = cache.version(loader_name)
+                loaded = await fn(*head, missing)
+                fresh = cache.version(loader_name) == version
+                for key, value in zip(missing, loaded):
+                    results[key] = value
+                    if fresh and not isinstance(value, Exception):
+                        cache.set(loader_name, key, value, ttl)
+
+            return [results[key] for key in keys]
+
+        wrapper.cache_name = loader_name
+        return wrapper
+    return decorator
@@ -0,0 +1,120 @@
+"""
+process wide batch coalescing for loaders of different requests
+
+every request has its own TaskLoader / strawberry DataLoader, so 50 concurrent requests
+issue 50 batches with nearly the same keys, each paying the DB round trip. a batch
+function decorated with `@coalesced()` parks its keys for a short window, keys from all
+callers in that window go to the backend as one batch, keys already being loaded join
+the running batch, and results are fanned back out:
+
+    class TaskLoader(DataLoader):
+        @cached(invalidate_on=(TASKS_DB, 'story_id'))
+        @coalesced()
+        async def batch_load_fn(self, story_ids): ...
+
+it is opt-in, set LOADER_COALESCE=true to enable it, LOADER_COALESCE_WINDOW_MS (default 2)
+sets the window. like the cache, only loaders whose result depends on the keys alone may
+be coalesced, the backend batch runs with the arguments of the first caller.
+"""
+import asyncio
+import functools
+import os
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Set
+
+COALESCE_ENABLED = os.getenv('LOADER_COALESCE', 'false').lower() == 'true'
+COALESCE_WINDOW = float(os.getenv('LOADER_COALESCE_WINDOW_MS', '2')) / 1000
+
+# name -> Coalescer, for stats
+COALESCERS: Dict[str, 'Coalescer'] = {}
+
+
+class Coalescer:
+    def __init__(self, fn: Callable, window: float):
+        self.fn = fn
+        self.window = window
+        self._pending: Dict[Hashable, asyncio.Future] = {}  # waiting for the next dispatch
+        self._inflight: Dict[Hashable, asyncio.Future] = {}  # backend batch running
+        self._head: Sequence[Any] = ()
+        self._scheduled = False
+        self._tasks: Set[asyncio.Task] = set()  # the loop keeps weak references only
+
+        self.calls = 0
+        self.batches = 0
+        self.requested_keys = 0
+        self.dispatched_keys = 0
+
+    async def load(self, head: Sequence[Any], keys: List[Hashable]) -> List[Any]:
+        loop = asyncio.get_running_loop()
+        self.calls += 1
+        self.requested_keys += len(keys)
+
+        futures = []
+        for key in keys:
+            future = self._inflight.get(key) or self._pending.get(key)
+            if future is None:
+                future = loop.create_future()
+                self._pending[key] = future
+            futures.append(future)
+
+        if self._pending and not self._scheduled:
+            self._scheduled = True
+            self._head = head
+            loop.call_later(self.window, self._dispatch)
+
+        # shield: a cancelled request must not cancel results shared with others
+        return list(await asyncio.gather(*[asyncio.shield(f) for f in futures]))
+
+    def _dispatch(self):
+        self._scheduled = False
+        batch, self._pending = self._pending, {}
+        self._inflight.update(batch)
+        self.batches += 1
+        self.dispatched_keys += len(batch)
+        task = asyncio.ensure_future(self._run(self._head, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, head: Sequence[Any], batch: Dict[Hashable, asyncio.Future]):
+        keys = list(batch)
+        try:
+            values = list(await self.fn(*head, keys))
+            if len(values) != len(keys):  # unresolved futures would hang every caller
+                raise ValueError(f'{self.fn.__qualname__} returned {len(values)} results for {len(keys)} keys')
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for key, value in zip(keys, values):
+                if not batch[key].done():
+                    batch[key].set_result(value)
+        finally:
+            for key in keys:
+                if self._inflight.get(key) is batch[key]:
+                    del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'batches': self.batches,
+            'requested_keys': self.requested_keys,
+            'dispatched_keys': self.dispatched_keys,
+        }
+
+
+def coalesced(window: Optional[float] = None, name: Optional[str] = None) -> Callable:
+    """decorate a batch load function (keys as the last positional argument)"""
+    def decorator(fn):
+        loader_name = name or f'{fn.__module__}.{fn.__qualname__}'
+        coalescer = COALESCERS[loader_name] = Coalescer(fn, COALESCE_WINDOW if window is None else window)
+
+        @functools.wraps(fn)
+        async def wrapper(*args):
+            if not COALESCE_ENABLED:
+                return await fn(*args)
+            *head, keys = args
+            return await coalescer.load(head, keys)
+
+        wrapper.coalescer = coalescer
+        return wrapper
+    return decorator
@@ -0,0 +1,177 @@
+"""
+aggregate collectors for `__pydantic_resolve_collect__`
+
+`Collector(alias, flat=True)` keeps every collected value until the post method reduces
+them. these reduce while collecting, O(1) memory per parent (GroupCount: one counter per
+distinct key):
+
+    class Sprint(BaseSprint):
+        task_count: int = 0
+        def post_task_count(self, collector=Count(alias='task_count')):
+            return collector.values()
+
+a collected value which is a sequence other than a string (eg: a `tasks` field, list or
+common.columnar Rows) is folded item by item, `field` picks an attribute of each item (a
+column of Rows, read without materializing them), `scale` multiplies Ratio / Mean results, `default`
+(Mean, Ratio, Min / Max) is returned when nothing was collected.
+
+batch mode: group_ratio / group_mean compute one aggregate per parent over columnar child
+data (one sequence of values per parent) in a single pass, with NumPy when installed,
+see `offloaded(batch=...)` in common.offload.
+"""
+import abc
+import collections.abc
+import itertools
+from typing import Any, Dict, List, Optional, Sequence
+
+from pydantic_resolve import ICollector
+
+from common.columnar import Rows
+
+try:
+    import numpy as np
+except ImportError:  # optional, batch mode falls back to plain python
+    np = None
+
+
+def is_batch(val) -> bool:
+    """collected value holding several items"""
+    return isinstance(val, collections.abc.Sequence) and not isinstance(val, (str, bytes, bytearray))
+
+
+class Aggregate(ICollector, abc.ABC):
+    def __init__(self, alias: str, field: Optional[str] = None):
+        super().__init__(alias)
+        self.field = field
+
+    def add(self, val) -> None:
+        if isinstance(val, Rows) and self.field is not None:
+            for value in val.column(self.field):
+                self.fold(value)
+        elif is_batch(val):
+            for item in val:
+                self.fold(item if self.field is None else getattr(item, self.field))
+        else:
+            self.fold(val if self.field is None else getattr(val, self.field))
+
+    @abc.abstractmethod
+    def fold(self, value) -> None:
+        """reduce one collected item"""
+
+
+class Count(Aggregate):
+    """number of collected items"""
+    def __init__(self, alias: str):
+        super().__init__(alias)
+        self.count = 0
+
+    def add(self, val) -> None:
+        self.count += len(val) if is_batch(val) else 1
+
+    def fold(self, value) -> None:
+        self.count += 1
+
+    def values(self) -> int:
+        return self.count
+
+
+class Sum(Aggregate):
+    def __init__(self, alias: str, field: Optional[str] = None):
+        super().__init__(alias, field)
+        self.total = 0
+
+    def fold(self, value) -> None:
+        self.total += value
+
+    def values(self):
+        return self.total
+
+
+class Mean(Aggregate):
+    def __init__(self, alias: str, field: Optional[str] = None, scale: float = 1, default: Any = 0):
+        super().__init__(alias, field)
+        self.default = default
+        self.scale = scale
+        self.total = 0
+        self.count = 0
+
+    def fold(self, value) -> None:
+        self.total += value
+        self.count += 1
+
+    def values(self):
+        return self.total / self.count * self.scale if self.count else self.default
+
+
+class Ratio(Aggregate):
+    """share of truthy items, eg: Ratio('done_perc', field='done', scale=100)"""
+    def __init__(self, alias: str, field: Optional[str] = None, scale: float = 1, default: Any = 0):
+        super().__init__(alias, field)
+        self.default = default
+        self.scale = scale
+        self.hits = 0
+        self.count = 0
+
+    def fold(self, value) -> None:
+        if value:
+            self.hits += 1
+        self.count += 1
+
+    def values(self):
+        return self.hits / self.count * self.scale if self.count else self.default
+
+
+class Min(Aggregate):
+    def __init__(self, alias: str, field: Optional[str] = None, default: Any = None):
+        super().__init__(alias, field)
+        self.default = default
+        self.value = None
+
+    def fold(self, value) -> None:
+        if self.value is None or value < self.value:
+            self.value = value
+
+    def values(self):
+        return self.default if self.value is None else self.value
+
+
+class Max(Min):
+    def fold(self, value) -> None:
+        if self.value is None or value > self.value:
+            self.value = value
+
+
+class GroupCount(Aggregate):
+    """items per distinct value of `field`, eg: GroupCount('by_owner', field='owner')"""
+    def __init__(self, alias: str, field: Optional[str] = None):
+        super().__init__(alias, field)
+        self.counts: Dict[Any, int] = {}
+
+    def fold(self, value) -> None:
+        self.counts[value] = self.counts.get(value, 0) + 1
+
+    def values(self) -> Dict[Any, int]:
+        return self.counts
+
+
+def _group_reduce(groups: Sequence[Sequence[Any]], scale: float, default: Any, dtype) -> List[Any]:
+    lengths = np.fromiter(map(len, groups), dtype=np.int64, count=len(groups))
+    flat = np.fromiter(itertools.chain.from_iterable(groups), dtype=dtype, count=int(lengths.sum()))
+    totals = np.bincount(np.repeat(np.arange(len(groups)), lengths), weights=flat, minlength=len(groups))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = totals / lengths * scale
+    return [value if length else default for value, length in zip(result.tolist(), lengths.tolist())]
+
+
+def group_ratio(groups: Sequence[Sequence[Any]], scale: float = 1, default: Any = 0) -> List[Any]:
+    """share of truthy values of every group"""
+    if np is None or not groups:
+        return [sum(1 for v in group if v) / len(group) * scale if group else default for group in groups]
+    return _group_reduce(groups, scale, default, bool)
+
+
+def group_mean(groups: Sequence[Sequence[Any]], scale: float = 1, default: Any = 0) -> List[Any]:
+    """mean of the numeric values of every group"""
+    if np is None or not groups:
+        return [sum(group) / len(group) * scale if group else default for group in groups]
+    return _group_reduce(groups, scale, default, np.float64)
@@ -0,0 +1,137 @@
+"""
+columnar (struct of arrays) loader results for wide fan-out leaf children
+
+a loader returning thousands of rows per key has every row validated into a model
+instance, one object per row, before anything reads them. `group_columns` turns the
+grouped rows of a batch into one ColumnBatch (a list per field, offsets per key) and
+returns a lazy Rows view per key instead:
+
+    class ColumnarTaskLoader(DataLoader):
+        async def batch_load_fn(self, story_ids):
+            return group_columns(BaseTask, TASKS_DB.group_by('story_id', story_ids))
+
+    class ColumnarStory(BaseStory):
+        tasks: Columnar[BaseTask] = []
+
+a `Columnar[T]` field keeps a Rows value as is (pydantic_resolve's conversion included),
+serializes it from the columns without building T instances, and behaves like list[T]
+otherwise. Rows items are validated into T on first access (cached), `rows.column(name)`
+reads a field without materializing.
+
+the items are not traversed by the resolver, use it for leaf children only (no resolve_ /
+post_ methods on T). a list[T] field does not take Rows, so the Columnar views get their
+own loader and route (app_bench /sprints-columnar), the list[T] views stay as they are.
+it is opt-in, set COLUMNAR=true to enable it.
+"""
+import functools
+import os
+from collections.abc import Sequence
+from typing import Any, Dict, List, Optional
+
+from pydantic_core import core_schema
+
+from common.serialize import type_adapter
+
+COLUMNAR_ENABLED = os.getenv('COLUMNAR', 'false').lower() == 'true'
+
+
+def model_fields(model: Any) -> List[str]:
+    """field names of a pydantic model or dataclass, in declaration order"""
+    fields = getattr(model, 'model_fields', None) or getattr(model, '__dataclass_fields__')
+    return list(fields)
+
+
+class ColumnBatch:
+    def __init__(self, model: Any, columns: Dict[str, List[Any]], offsets: List[int]):
+        self.model = model
+        self.columns = columns
+        self.offsets = offsets  # group i is rows offsets[i]:offsets[i + 1]
+
+    @classmethod
+    def from_groups(cls, model: Any, groups: List[List[dict]]) -> 'ColumnBatch':
+        rows = [row for group in groups for row in group]
+        columns = {name: [row[name] for row in rows] for name in model_fields(model)}
+        offsets = [0]
+        for group in groups:
+            offsets.append(offsets[-1] + len(group))
+        return cls(model, columns, offsets)
+
+    def slices(self) -> List['Rows']:
+        return [Rows(self, start, stop) for start, stop in zip(self.offsets, self.offsets[1:])]
+
+
+class Rows(Sequence):
+    """lazy view of one group of a ColumnBatch"""
+    __slots__ = ('batch', 'start', 'stop', '_items')
+
+    def __init__(self, batch: ColumnBatch, start: int, stop: int):
+        self.batch = batch
+        self.start = start
+        self.stop = stop
+        self._items: Optional[List[Any]] = None
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, index):
+        return self.materialize()[index]
+
+    def __iter__(self):
+        return iter(self.materialize())
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other) if isinstance(other, (list, Rows)) else NotImplemented
+
+    def __repr__(self) -> str:
+        return f'Rows({self.batch.model.__name__}, {len(self)})'
+
+    def column(self, name: str) -> List[Any]:
+        return self.batch.columns[name][self.start:self.stop]
+
+    def dicts(self) -> List[Dict[str, Any]]:
+        names = list(self.batch.columns)
+        columns = [self.column(name) for name in names]
+        return [dict(zip(names, values)) for values in zip(*columns)]
+
+    def materialize(self) -> List[Any]:
+        if self._items is None:
+            adapter = type_adapter(self.batch.model)
+            self._items = [adapter.validate_python(row) for row in self.dicts()]
+        return self._items
+
+
+def group_columns(model: Any, groups: List[List[dict]]) -> List[Any]:
+    """Rows per key when COLUMNAR=true, the grouped rows unchanged otherwise"""
+    if not COLUMNAR_ENABLED:
+        return groups
+    return ColumnBatch.from_groups(model, groups).slices()
+
+
+def _keep_rows(value, handler):
+    return value if isinstance(value, Rows) else handler(value)
+
+
+def _dump_rows(value, handler):
+    return value.dicts() if isinstance(value, Rows) else handler(value)
+
+
+@functools.lru_cache(maxsize=None)
+def _columnar_type(item: Any) -> type:
+    def schema(cls, source, handler):
+        list_schema = handler.generate_schema(List[item])
+        return core_schema.no_info_wrap_validator_function(
+            _keep_rows, list_schema,
+            serialization=core_schema.wrap_serializer_function_ser_schema(_dump_rows, schema=list_schema))
+    # __origin__ / __args__: pydantic_resolve looks through list[T] this way to scan T
+    return type(f'Columnar[{item.__name__}]', (), {
+        '__get_pydantic_core_schema__': classmethod(schema), '__origin__': list, '__args__': (item,),
+        '__columnar__': True})
+
+
+class Columnar:
+    """
+    `Columnar[T]`: list[T] field accepting Rows, see module doc. a type rather than
+    Annotated metadata, pydantic_resolve converts values with the bare field annotation
+    """
+    def __class_getitem__(cls, item):
+        return _columnar_type(item)
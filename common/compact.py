@@ -0,0 +1,107 @@
+"""
+compact node classes generated from resolver view classes
+
+every resolved node of a pydantic view class carries a `__dict__`, the fields-set
+tracking and private attributes, a pydantic dataclass carries a `__dict__`. `compact(kls)`
+generates a plain `@dataclass(slots=True)` with the same fields in the same order, the
+field types compacted too (list[BaseTask] -> list[Compact BaseTask]), and the same
+resolve_ / post_ methods and `__pydantic_resolve_*__` settings, so pydantic_resolve
+resolves it and pydantic serializes it exactly like the original:
+
+    CompactSprint = compact(Sprint)
+
+    @router.get('/sprints', response_model=list[CompactSprint])
+    async def get_sprints():
+        return await Resolver().resolve([CompactSprint(id=1, name='Sprint 1', start=...)])
+
+fields are keyword only, self referencing classes and methods using zero argument super()
+are not supported.
+"""
+import copy
+import dataclasses
+import typing
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+
+from common.columnar import Columnar
+
+# class level settings read by pydantic_resolve, its *_forward_refs_updated__ flags are not copied
+SETTINGS = ('__pydantic_resolve_expose__', '__pydantic_resolve_collect__')
+
+_COMPACT: Dict[type, Optional[type]] = {}
+
+
+def _is_node_class(tp: Any) -> bool:
+    return isinstance(tp, type) and (issubclass(tp, BaseModel) or dataclasses.is_dataclass(tp))
+
+
+def _convert(tp: Any) -> Any:
+    """swap node classes nested in list / Optional / Columnar annotations for their compact class"""
+    if _is_node_class(tp):
+        return compact(tp)
+    if getattr(tp, '__columnar__', False):
+        return Columnar[_convert(tp.__args__[0])]
+    origin, args = typing.get_origin(tp), typing.get_args(tp)
+    if origin is list:
+        return List[_convert(args[0])]
+    if origin is Union:
+        return Union[tuple(_convert(arg) for arg in args)]
+    return tp
+
+
+def _field(default: Any, default_factory: Any) -> Any:
+    if default_factory not in (None, dataclasses.MISSING):
+        return dataclasses.field(default_factory=default_factory)
+    if default in (PydanticUndefined, dataclasses.MISSING):
+        return dataclasses.field()
+    if isinstance(default, (list, dict, set)):  # pydantic copies mutable defaults
+        return dataclasses.field(default_factory=lambda: copy.copy(default))
+    return dataclasses.field(default=default)
+
+
+def _fields(kls: type) -> List[Tuple[str, Any, Any]]:
+    if issubclass(kls, BaseModel):
+        return [(name, _convert(info.annotation), _field(info.default, info.default_factory))
+                for name, info in kls.model_fields.items()]
+    hints = typing.get_type_hints(kls)
+    return [(f.name, _convert(hints[f.name]), _field(f.default, f.default_factory))
+            for f in dataclasses.fields(kls)]
+
+
+def _namespace(kls: type, field_names: List[str]) -> Dict[str, Any]:
+    """methods and resolver settings along the MRO, without the pydantic machinery"""
+    skip = set(dir(BaseModel)) | set(field_names)
+    namespace: Dict[str, Any] = {}
+    for base in reversed(kls.__mro__):
+        if base in (object, BaseModel):
+            continue
+        for name, value in vars(base).items():
+            if name in SETTINGS or not (name.startswith('_') or name in skip):
+                namespace[name] = value
+    namespace['__module__'] = kls.__module__
+    namespace['__doc__'] = f'compact {kls.__qualname__}'
+    return namespace
+
+
+def compact(kls: type) -> type:
+    """slots dataclass generated from a pydantic model or dataclass, cached per class"""
+    if kls in _COMPACT:
+        result = _COMPACT[kls]
+        if result is None:
+            raise TypeError(f'{kls.__qualname__}: self referencing classes are not supported')
+        return result
+
+    _COMPACT[kls] = None
+    try:
+        fields = _fields(kls)
+        result = dataclasses.make_dataclass(
+            f'Compact{kls.__name__}', fields,
+            namespace=_namespace(kls, [name for name, _, _ in fields]),
+            kw_only=True, slots=True)
+    except BaseException:
+        del _COMPACT[kls]
+        raise
+    _COMPACT[kls] = result
+    return result
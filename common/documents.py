@@ -0,0 +1,159 @@
+"""
+process wide cache of parsed and validated GraphQL documents, with persisted queries
+
+every `/graphql` POST of bench.sh sends the same body.json query, strawberry parses and
+validates it again for each request. `DocumentCacheExtension` keys documents by the
+sha256 of the query text: the parsed document and the validation errors (per schema and
+validation rules) are computed once, later requests with the same query skip both:
+
+    schema = strawberry.Schema(query=Query, extensions=schema_extensions())
+
+persisted queries follow the automatic persisted queries protocol (apollo): a client
+sends the hash alone,
+
+    {"extensions": {"persistedQuery": {"version": 1, "sha256Hash": "<sha256 of the query>"}}}
+
+an unknown hash is answered with a PERSISTED_QUERY_NOT_FOUND error, the client then
+sends query + hash once, which registers it. registered queries live in the same LRU,
+an evicted one is simply registered again.
+
+it is on by default, GRAPHQL_DOCUMENT_CACHE=false disables it (and persisted queries),
+GRAPHQL_DOCUMENT_CACHE_SIZE (default 128) bounds the number of documents.
+"""
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterator, List, Optional
+
+from graphql import DocumentNode, GraphQLError
+from strawberry.extensions import SchemaExtension
+
+
+def query_hash(query: str) -> str:
+    """sha256 hex digest of the query text, the persisted query id"""
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+class Document:
+    """a query, its parsed document once parsed, its errors per (schema, validation rules)"""
+    __slots__ = ('query', 'document', 'errors')
+
+    def __init__(self, query: str):
+        self.query = query
+        self.document: Optional[DocumentNode] = None
+        self.errors: Dict[Hashable, List[GraphQLError]] = {}
+
+
+class DocumentCache:
+    """LRU of Documents keyed by query hash"""
+    def __init__(self, max_size: int, enabled: bool = True):
+        self.max_size = max_size
+        self.enabled = enabled
+
+        self._entries: 'OrderedDict[str, Document]' = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.persisted_hits = 0
+        self.persisted_misses = 0
+
+    def get(self, digest: str) -> Optional[Document]:
+        entry = self._entries.get(digest)
+        if entry is not None:
+            self._entries.move_to_end(digest)
+        return entry
+
+    def lookup(self, digest: str, query: str) -> Document:
+        """the cached Document of query, or a new one (a miss) to put() once parsed"""
+        entry = self.get(digest)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return Document(query)
+
+    def put(self, digest: str, entry: Document):
+        self._entries[digest] = entry
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'entries': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'persisted_hits': self.persisted_hits,
+            'persisted_misses': self.persisted_misses,
+        }
+
+
+DOCUMENT_CACHE = DocumentCache(
+    max_size=int(os.getenv('GRAPHQL_DOCUMENT_CACHE_SIZE', '128')),
+    enabled=os.getenv('GRAPHQL_DOCUMENT_CACHE', 'true').lower() == 'true')
+
+
+class DocumentCacheExtension(SchemaExtension):
+    """
+    resolves persisted query hashes, then serves the document and the validation
+    errors from DOCUMENT_CACHE, strawberry skips parsing / validation when they are set.
+    documents which fail to parse are not cached.
+    """
+    cache = DOCUMENT_CACHE
+
+    def on_operation(self) -> Iterator[None]:
+        context = self.execution_context
+        self.entry: Optional[Document] = None
+        self.digest: Optional[str] = None
+        persisted = (context.operation_extensions or {}).get('persistedQuery')
+
+        if persisted is not None:
+            digest = persisted.get('sha256Hash') if isinstance(persisted, dict) else None
+            if not isinstance(digest, str) or persisted.get('version', 1) != 1:
+                raise GraphQLError('Unsupported persisted query',
+                                   extensions={'code': 'PERSISTED_QUERY_NOT_SUPPORTED'})
+            if context.query is None:
+                self.entry = self.cache.get(digest)
+                if self.entry is None:
+                    self.cache.persisted_misses += 1
+                    raise GraphQLError('PersistedQueryNotFound',
+                                       extensions={'code': 'PERSISTED_QUERY_NOT_FOUND'})
+                self.cache.persisted_hits += 1
+                self.cache.hits += 1
+                context.query = self.entry.query
+            elif query_hash(context.query) != digest:
+                raise GraphQLError('provided sha does not match query',
+                                   extensions={'code': 'PERSISTED_QUERY_HASH_MISMATCH'})
+            else:
+                self.digest, self.entry = digest, self.cache.lookup(digest, context.query)
+        elif context.query is not None:
+            self.digest = query_hash(context.query)
+            self.entry = self.cache.lookup(self.digest, context.query)
+        yield
+
+    def on_parse(self) -> Iterator[None]:
+        entry = self.entry
+        if entry is not None and entry.document is not None:
+            self.execution_context.graphql_document = entry.document
+        yield
+        if entry is not None and entry.document is None and self.execution_context.graphql_document is not None:
+            entry.document = self.execution_context.graphql_document
+            self.cache.put(self.digest, entry)  # syntax errors never take a slot
+
+    def on_validate(self) -> Iterator[None]:
+        context = self.execution_context
+        entry = self.entry
+        key = (context.schema, context.validation_rules)
+        errors = entry.errors.get(key) if entry is not None else None
+        if errors is not None:
+            context.pre_execution_errors = list(errors)
+        yield
+        if entry is not None and errors is None and context.pre_execution_errors is not None:
+            entry.errors[key] = list(context.pre_execution_errors)
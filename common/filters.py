@@ -0,0 +1,67 @@
+"""
+typed row filters evaluated by the store
+
+a loader configured with filters (loader_params, GraphQL field arguments) used to check
+every row against a list in python. these specs are passed down to `Table.group_by(...,
+where=...)`: filters on the primary key or an indexed column resolve to a set of primary
+keys through the indexes, the others are checked per row. a `Where` is a tuple of filters
+combined with AND:
+
+    STORIES_DB.group_by('sprint_id', sprint_ids, where=(In('id', [1, 2, 3]), Range('point', 3, 8)))
+
+filters are frozen, equal specs hash equal, so they can be part of DataLoader keys
+(common/partition.py batches them per distinct filter).
+"""
+import dataclasses
+from typing import Any, Collection, Optional, Tuple, Union
+
+
+@dataclasses.dataclass(frozen=True)
+class Eq:
+    column: str
+    value: Any
+
+    def candidates(self, table) -> Optional[Collection[Any]]:
+        """values of the column that match, None when they can't be listed"""
+        return (self.value,)
+
+    def __call__(self, row: dict) -> bool:
+        return row[self.column] == self.value
+
+
+@dataclasses.dataclass(frozen=True)
+class In:
+    column: str
+    values: frozenset
+
+    def __post_init__(self):
+        object.__setattr__(self, 'values', frozenset(self.values))
+
+    def candidates(self, table) -> Optional[Collection[Any]]:
+        return self.values
+
+    def __call__(self, row: dict) -> bool:
+        return row[self.column] in self.values
+
+
+@dataclasses.dataclass(frozen=True)
+class Range:
+    """low <= value <= high, None for an open end"""
+    column: str
+    low: Any = None
+    high: Any = None
+
+    def _contains(self, value: Any) -> bool:
+        return (self.low is None or self.low <= value) and (self.high is None or value <= self.high)
+
+    def candidates(self, table) -> Optional[Collection[Any]]:
+        values = table.distinct(self.column)
+        return None if values is None else [v for v in values if self._contains(v)]
+
+    def __call__(self, row: dict) -> bool:
+        value = row[self.column]  # _contains inlined, called per row
+        return (self.low is None or self.low <= value) and (self.high is None or value <= self.high)
+
+
+Filter = Union[Eq, In, Range]
+Where = Tuple[Filter, ...]
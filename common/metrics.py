@@ -0,0 +1,231 @@
+"""
+process wide metrics registry, counters and histograms with labels (prometheus style)
+
+resolver runs and GraphQL operations are instrumented by common.trace, with METRICS=true
+every finished trace is folded in, under the same metric names for both sides:
+
+- method_calls_total / method_seconds_total {source, method}: resolve_* / post_* methods
+  (source="resolver", eg: app_bench.resolver.Sprint.resolve_stories) and strawberry field resolvers
+  (source="graphql", eg: Sprint.stories)
+- loader_batch_size / loader_batch_seconds / loader_queue_wait_seconds {source, loader}:
+  one observation per DataLoader dispatch
+- resolved_nodes {source, root}: objects per resolved tree / GraphQL result
+- resolve_plan_compile_seconds {root}: one observation per compiled common.plan.Plan
+
+`install(app)` adds `GET /metrics` (text exposition format) and, with METRICS=true, a
+middleware recording http_request_duration_seconds {method, route, status} and the
+common.blocking.LagMonitor sampling event_loop_lag_seconds every METRICS_LAG_INTERVAL_MS
+(default 100):
+
+    app = FastAPI()
+    install(app)
+
+it is opt-in, set METRICS=true to enable it.
+"""
+import os
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Sequence, Tuple
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+
+METRICS_ENABLED = os.getenv('METRICS', 'false').lower() == 'true'
+LAG_INTERVAL = float(os.getenv('METRICS_LAG_INTERVAL_MS', '100')) / 1000
+
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+NODE_BUCKETS = (10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000, 500000)
+SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labelnames: Sequence[str], values: Dict[str, Any]) -> Labels:
+    return tuple((name, str(values[name])) for name in labelnames)
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ''
+    escaped = (v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in labels)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(int(value)) if float(value).is_integer() else repr(value)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, value: float = 1, **labels):
+        key = _labels(self.labelnames, labels)
+        self.values[key] = self.values.get(key, 0) + value
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [{'labels': dict(k), 'value': v} for k, v in self.values.items()]
+
+    def render(self) -> List[str]:
+        return [f'{self.name}{_format_labels(k)} {_format_value(v)}' for k, v in self.values.items()]
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = SECONDS_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [bucket counts (non cumulative, last one is +Inf), sum, count]
+        self.values: Dict[Labels, List[Any]] = {}
+
+    def observe(self, value: float, **labels):
+        key = _labels(self.labelnames, labels)
+        entry = self.values.get(key)
+        if entry is None:
+            entry = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        result = []
+        for key, (counts, total, count) in self.values.items():
+            cumulative, acc = {}, 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                acc += n
+                cumulative[str(bound)] = acc
+            result.append({'labels': dict(key), 'buckets': cumulative, 'sum': total, 'count': count})
+        return result
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in self.values.items():
+            acc = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                acc += n
+                lines.append(f'{self.name}_bucket{_format_labels(key + (("le", _format_value(bound)),))} {acc}')
+            lines.append(f'{self.name}_sum{_format_labels(key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(key)} {count}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Any] = {}
+
+    def _get(self, cls, name: str, *args, **kwargs):
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = cls(name, *args, **kwargs)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get(Counter, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = SECONDS_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, labelnames, buckets)
+
+    def clear(self):
+        for metric in self.metrics.values():
+            metric.values.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {name: {'type': m.kind, 'help': m.help, 'values': m.snapshot()} for name, m in self.metrics.items()}
+
+    def render(self) -> str:
+        """prometheus text exposition format 0.0.4"""
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f'# HELP {name} {metric.help}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = Registry()
+
+METHOD_CALLS = METRICS.counter('method_calls_total', 'resolve/post method or GraphQL field resolver calls', ('source', 'method'))
+METHOD_SECONDS = METRICS.counter('method_seconds_total', 'cumulative time of resolve/post methods or GraphQL field resolvers, awaited results included', ('source', 'method'))
+LOADER_BATCH_SIZE = METRICS.histogram('loader_batch_size', 'keys per DataLoader dispatch', ('source', 'loader'), SIZE_BUCKETS)
+LOADER_BATCH_SECONDS = METRICS.histogram('loader_batch_seconds', 'wall time of a DataLoader batch function', ('source', 'loader'))
+LOADER_QUEUE_WAIT = METRICS.histogram('loader_queue_wait_seconds', 'first key enqueued until the batch function starts', ('source', 'loader'))
+RESOLVED_NODES = METRICS.histogram('resolved_nodes', 'objects per resolved tree or GraphQL result', ('source', 'root'), NODE_BUCKETS)
+REQUEST_SECONDS = METRICS.histogram('http_request_duration_seconds', 'request latency, streamed bodies included', ('method', 'route', 'status'))
+EVENT_LOOP_LAG = METRICS.histogram('event_loop_lag_seconds', 'delay of a timer scheduled on the event loop')
+PLAN_COMPILE_SECONDS = METRICS.histogram('resolve_plan_compile_seconds', 'model graph scan of a root class, once per class (common.plan)', ('root',))
+
+
+def observe_trace(trace) -> None:
+    """fold a finished common.trace.Trace into the registry"""
+    source = trace.source
+    for method, stat in trace.methods.items():
+        METHOD_CALLS.inc(stat['calls'], source=source, method=method)
+        METHOD_SECONDS.inc(stat['total'], source=source, method=method)
+    for loader, stat in trace.loaders.items():
+        for size, wall, wait in zip(stat['sizes'], stat['walls'], stat['waits']):
+            LOADER_BATCH_SIZE.observe(size, source=source, loader=loader)
+            LOADER_BATCH_SECONDS.observe(wall, source=source, loader=loader)
+            LOADER_QUEUE_WAIT.observe(wait, source=source, loader=loader)
+    if trace.nodes is not None:
+        RESOLVED_NODES.observe(trace.nodes, source=source, root=trace.label)
+
+
+def route_label(scope: Dict[str, Any]) -> str:
+    """route template, not the raw path, to keep label cardinality bounded"""
+    route = scope.get('route')
+    if route is None:
+        return 'unmatched'
+    context = scope.get('fastapi', {}).get('effective_route_context')  # routes of included routers
+    return getattr(context, 'path_format', None) or getattr(route, 'path_format', None) or scope['path']
+
+
+class MetricsMiddleware:
+    def __init__(self, app, monitor=None):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        if self.monitor is not None:
+            self.monitor.ensure_started()
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - start, method=scope['method'],
+                                    route=route_label(scope), status=status)
+
+
+async def metrics_endpoint():
+    body = METRICS.render() if METRICS_ENABLED else '# set METRICS=true to collect metrics\n'
+    return PlainTextResponse(body, media_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def install(app: FastAPI, path: str = '/metrics'):
+    # common.blocking reports into this registry
+    from common.blocking import BLOCKING_ENABLED, LagMonitor
+
+    app.add_api_route(path, metrics_endpoint, methods=['GET'], include_in_schema=False)
+    if METRICS_ENABLED or BLOCKING_ENABLED:
+        app.add_middleware(MetricsMiddleware, monitor=LagMonitor())
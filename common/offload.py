@@ -0,0 +1,144 @@
+"""
+run CPU heavy post processing off the event loop, batched
+
+post methods run inline on the event loop. move the computation into a module level
+function of compact, picklable data and decorate it with `@offloaded()`; the post method
+returns its result, which is a future when offloading is enabled (pydantic_resolve awaits
+futures returned by post methods):
+
+    @offloaded()
+    def done_perc(dones: List[bool]) -> float: ...
+
+    class SimpleStory(BaseModel):
+        def post_done_perc(self):
+            return done_perc([t.done for t in self.tasks])
+
+calls made in the same event loop iteration (every SimpleStory of a tree reaches its post
+phase together) are sent to the pool as one job per function, instead of one per node.
+`offloaded(batch=fn)` computes such a job with one call of fn(list of args) -> list of
+results, eg: the NumPy backed common.collectors.group_ratio.
+
+it is opt-in, set OFFLOAD=thread or OFFLOAD=process (default off), OFFLOAD=batch groups
+the calls the same way but runs the jobs on the event loop, OFFLOAD_WORKERS sets
+the pool size (default: executor's default). OFFLOAD=process starts workers with
+forkserver, which imports the main module again: entry scripts need the usual
+`if __name__ == '__main__':` guard (uvicorn and `python -m benchmarks.offload` have it).
+"""
+import asyncio
+import functools
+import importlib
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+OFFLOAD_MODE = os.getenv('OFFLOAD', 'off').lower()
+OFFLOAD_WORKERS = int(os.getenv('OFFLOAD_WORKERS', '0')) or None
+
+
+def _run_batch(module: str, qualname: str, args: List[Any]) -> List[Any]:
+    """executed in the pool, looks the function up by name so it works across processes"""
+    wrapper = getattr(importlib.import_module(module), qualname)
+    if wrapper.batch is not None:
+        return wrapper.batch(args)
+    return [wrapper.__wrapped__(arg) for arg in args]
+
+
+class Offloader:
+    def __init__(self, mode: str = OFFLOAD_MODE, workers: Optional[int] = OFFLOAD_WORKERS):
+        self.mode = mode
+        self.workers = workers
+        self._executors: Dict[str, Executor] = {}
+        # (module, qualname) -> pending (arg, future) of this loop iteration
+        self._pending: Dict[Tuple[str, str], List[Tuple[Any, asyncio.Future]]] = {}
+
+        self.calls = 0
+        self.batches = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in ('thread', 'process', 'batch')
+
+    def executor(self) -> Executor:
+        executor = self._executors.get(self.mode)
+        if executor is None:
+            if self.mode == 'process':
+                # forkserver: forking a process which runs an event loop and threads is unsafe
+                executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('forkserver'))
+            else:
+                executor = ThreadPoolExecutor(self.workers, thread_name_prefix='offload')
+            self._executors[self.mode] = executor
+        return executor
+
+    def submit(self, key: Tuple[str, str], arg: Any) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(key, [])
+        if not pending:
+            loop.call_soon(self._dispatch, key)
+        pending.append((arg, future))
+        self.calls += 1
+        return future
+
+    def _dispatch(self, key: Tuple[str, str]):
+        batch = self._pending.pop(key, [])
+        if not batch:
+            return
+        self.batches += 1
+        if self.mode == 'batch':
+            try:
+                values = _run_batch(*key, [arg for arg, _ in batch])
+            except Exception as e:
+                return self._fail(batch, e)
+            return self._set_results(batch, values)
+
+        loop = asyncio.get_running_loop()
+        try:
+            job = loop.run_in_executor(self.executor(), _run_batch, *key, [arg for arg, _ in batch])
+        except Exception as e:  # eg: the pool can not start, fail the calls instead of hanging
+            self._fail(batch, e)
+        else:
+            job.add_done_callback(lambda done: self._resolve(done, batch))
+
+    @staticmethod
+    def _fail(batch: List[Tuple[Any, asyncio.Future]], error: BaseException):
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def _resolve(self, job: asyncio.Future, batch: List[Tuple[Any, asyncio.Future]]):
+        if job.exception() is not None:
+            return self._fail(batch, job.exception())
+        self._set_results(batch, job.result())
+
+    @staticmethod
+    def _set_results(batch: List[Tuple[Any, asyncio.Future]], values: List[Any]):
+        for (_, future), value in zip(batch, values):
+            if not future.done():
+                future.set_result(value)
+
+    def shutdown(self):
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._executors.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {'mode': self.mode, 'calls': self.calls, 'batches': self.batches}
+
+
+OFFLOADER = Offloader()
+
+
+def offloaded(offloader: Offloader = OFFLOADER, batch: Optional[Callable[[List[Any]], List[Any]]] = None) -> Callable:
+    """decorate a module level function of one picklable argument, see module doc"""
+    def decorator(fn):
+        key = (fn.__module__, fn.__qualname__)
+
+        @functools.wraps(fn)
+        def wrapper(arg):
+            if not offloader.enabled:
+                return fn(arg)
+            return offloader.submit(key, arg)
+        wrapper.batch = batch
+        return wrapper
+    return decorator
@@ -0,0 +1,34 @@
+"""
+per parent pagination of loader results
+
+a story with 50k tasks gets all of them loaded, validated and serialized. a `Page` asks
+for at most `limit` children per parent, skipping `offset` of them, or starting after the
+child whose primary key is `after` (cursor pagination, stable under inserts). the store
+applies it to every group of a batch at once, rows outside the page are never touched:
+
+    TASKS_DB.page_by('story_id', story_ids, Page(limit=10, after=last_task_id))
+    TASKS_DB.count_by('story_id', story_ids)  # totals, from the index sizes
+
+children are in the table's insertion order. pages are frozen, usable as loader params
+(pydantic_resolve) and as PartitionedLoader arguments (strawberry).
+"""
+import dataclasses
+from typing import Any, Optional
+
+
+@dataclasses.dataclass(frozen=True)
+class Page:
+    limit: Optional[int] = None  # None: no limit
+    offset: int = 0  # rows skipped, after the cursor if any
+    after: Any = None  # primary key of the last row of the previous page
+
+    def __post_init__(self):
+        if self.limit is not None and self.limit < 0:
+            raise ValueError(f'page limit must be >= 0, got {self.limit}')
+        if self.offset < 0:
+            raise ValueError(f'page offset must be >= 0, got {self.offset}')
+
+    @property
+    def unbounded(self) -> bool:
+        """every row"""
+        return self.limit is None and self.offset == 0 and self.after is None
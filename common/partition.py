@@ -0,0 +1,73 @@
+"""
+DataLoader batches partitioned by argument
+
+a GraphQL field with arguments (`stories2(ids: [Int!]!)`) loads (parent key, arguments)
+pairs, and a batch may mix several argument sets: a plain batch function has to sort
+them out itself, or wrongly applies the first one to every key. `PartitionedLoader` is
+a strawberry DataLoader of (key, args) pairs whose batch function receives one argument
+set and the keys loaded with it:
+
+    async def batch_load_stories_with_filter(ids: Tuple[int, ...], sprint_ids: List[int]):
+        ...
+
+    loader = PartitionedLoader(load_fn=batch_load_stories_with_filter)
+    await loader.load((sprint.id, ids))
+
+pending keys are grouped by their arguments, one batch per distinct argument set, run
+concurrently. arguments are made hashable (`canonical`: lists -> tuples, sets ->
+frozensets, dicts -> sorted item tuples), the batch function gets the canonical form and
+equal keys share one cache entry. list order is kept, [1, 2] and [2, 1] are two argument
+sets, pass a set or a common.filters spec when order doesn't matter.
+"""
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Sequence, Tuple
+
+from strawberry.dataloader import DataLoader
+
+
+def canonical(value: Any) -> Hashable:
+    """hashable equivalent of arguments built from lists, sets and dicts"""
+    if isinstance(value, (list, tuple)):
+        try:  # flat lists of hashable items, the common case, without recursing
+            items = tuple(value)
+            hash(items)
+            return items
+        except TypeError:
+            return tuple(canonical(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        try:
+            return frozenset(value)
+        except TypeError:
+            return frozenset(canonical(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, canonical(item)) for key, item in value.items()))
+    return value
+
+
+def partitioned(fn: Callable[[Hashable, List[Any]], Awaitable[Sequence[Any]]]) -> Callable:
+    """batch function of (key, args) pairs running `fn(args, keys)` per distinct args"""
+    @functools.wraps(fn)
+    async def load_fn(pairs: List[Tuple[Any, Any]]) -> List[Any]:
+        partitions: Dict[Hashable, List[int]] = {}
+        for i, (_, args) in enumerate(pairs):
+            partitions.setdefault(canonical(args), []).append(i)
+
+        batches = await asyncio.gather(*[fn(args, [pairs[i][0] for i in indexes])
+                                         for args, indexes in partitions.items()])
+        results: List[Any] = [None] * len(pairs)
+        for indexes, values in zip(partitions.values(), batches):
+            values = list(values)
+            if len(values) != len(indexes):
+                raise ValueError(f'{fn.__qualname__} returned {len(values)} results for {len(indexes)} keys')
+            for i, value in zip(indexes, values):
+                results[i] = value
+        return results
+    return load_fn
+
+
+class PartitionedLoader(DataLoader):
+    """strawberry DataLoader of (key, args) pairs, see module doc"""
+    def __init__(self, load_fn: Callable[[Hashable, List[Any]], Awaitable[Sequence[Any]]], **kwargs):
+        kwargs.setdefault('cache_key_fn', canonical)
+        super().__init__(load_fn=partitioned(load_fn), **kwargs)
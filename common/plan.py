@@ -0,0 +1,103 @@
+"""
+resolution plans compiled once per root class
+
+`pydantic_resolve.Resolver.resolve` scans the whole model graph on every call: which
+fields have resolve_ / post_ methods, their LoaderDepend / context / ancestor_context /
+parent / collector params, expose and collect wiring. the result only depends on the
+root class, PlanMixin (part of common.resolver.Resolver) compiles it on first use and
+reuses it, the rest of resolve() (re-keying by class, loader instances, the traversal)
+is the library's own. routes can compile their roots at import:
+
+    router = APIRouter()
+    precompile(Sprint, Query)
+
+the library has no hook for the scan: resolve() calls `analysis.scan_and_store_metadata`,
+which is wrapped to return the plan of the root being resolved by a PlanMixin, other
+callers scan as before. checked against pydantic-resolve==1.12.3 (requirements.txt);
+if an upgrade stops calling it, resolves still work but scan again, and plan_stats()
+shows the plans unused.
+
+compile time is kept per root (`plan_stats()`) and, with METRICS=true, observed as
+resolve_plan_compile_seconds {root}. it is on by default, set RESOLVE_PLAN=false to scan
+on every call again.
+"""
+import contextvars
+import functools
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from pydantic_resolve import analysis
+from pydantic_resolve.utils import class_util
+
+from common.metrics import METRICS_ENABLED, PLAN_COMPILE_SECONDS
+
+PLAN_ENABLED = os.getenv('RESOLVE_PLAN', 'true').lower() == 'true'
+
+# the library's scan, unwrapped if this module is reloaded
+_scan = getattr(analysis.scan_and_store_metadata, '__wrapped__', analysis.scan_and_store_metadata)
+
+
+class Plan:
+    def __init__(self, root: type):
+        self.root = root
+        start = time.perf_counter()
+        self.metadata = _scan(root)
+        self.compile_seconds = time.perf_counter() - start
+        self.uses = 0
+
+    @property
+    def name(self) -> str:
+        return f'{self.root.__module__}.{self.root.__qualname__}'
+
+    def stats(self) -> Dict[str, Any]:
+        return {'classes': len(self.metadata), 'compile_ms': round(self.compile_seconds * 1000, 3), 'uses': self.uses}
+
+
+_PLANS: Dict[type, Plan] = {}
+
+
+def get_plan(root: type) -> Plan:
+    plan = _PLANS.get(root)
+    if plan is None:
+        plan = _PLANS[root] = Plan(root)
+        if METRICS_ENABLED:
+            PLAN_COMPILE_SECONDS.observe(plan.compile_seconds, root=plan.name)
+    return plan
+
+
+def precompile(*roots: type) -> List[Plan]:
+    return [get_plan(root) for root in roots]
+
+
+def plan_stats() -> Dict[str, Dict[str, Any]]:
+    return {plan.name: plan.stats() for plan in _PLANS.values()}
+
+
+# the plan of the root being resolved by PlanMixin.resolve
+_CURRENT_PLAN: contextvars.ContextVar[Optional[Plan]] = contextvars.ContextVar('current_plan', default=None)
+
+
+@functools.wraps(_scan)
+def _planned_scan(root_class):
+    plan = _CURRENT_PLAN.get()
+    if plan is None or plan.root is not root_class:
+        return _scan(root_class)
+    plan.uses += 1
+    return plan.metadata
+
+
+analysis.scan_and_store_metadata = _planned_scan
+
+
+class PlanMixin:
+    """pydantic_resolve.Resolver.resolve with the scan served from a cached Plan"""
+    async def resolve(self, node):
+        if not PLAN_ENABLED or (isinstance(node, list) and node == []):
+            return await super().resolve(node)
+
+        token = _CURRENT_PLAN.set(get_plan(class_util.get_class(node)))
+        try:
+            return await super().resolve(node)
+        finally:
+            _CURRENT_PLAN.reset(token)
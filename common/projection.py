@@ -0,0 +1,45 @@
+"""
+field selection pushed down from the view classes into the store
+
+`SimpleStory` only declares id, name, point and tasks, yet StoryLoader ships whole story
+rows (owner, sprint_id ...) to be validated and dropped. pydantic_resolve tells every
+loader instance which classes consume it (`loader._query_meta`, the union of their
+declared fields in 'fields'), a batch function passes them to the store, which builds
+rows holding those columns only:
+
+    class StoryLoader(DataLoader):
+        async def batch_load_fn(self, sprint_ids):
+            return STORIES_DB.group_by('sprint_id', sprint_ids, columns=columns(self))
+
+filters still see whole rows (the store projects after filtering). `columns` is None,
+whole rows, for loaders without query meta (not created by a resolver) and while
+LOADER_CACHE or LOADER_COALESCE is on: cached and coalesced batches are shared by
+requests and views selecting different fields.
+
+it is opt-in, set FIELD_PROJECTION=true to enable it. python -m benchmarks.projection:
+the mock store hands out its own row dicts, projected rows are new ones, so cells shrink
+(~20% for these views) while time is unchanged and peak memory grows (~9%). the saving
+is for stores whose rows cross a wire.
+"""
+import os
+from typing import Any, Optional
+
+from common.cache import LOADER_CACHE
+from common.coalesce import COALESCE_ENABLED
+
+PROJECTION_ENABLED = os.getenv('FIELD_PROJECTION', 'false').lower() == 'true'
+
+
+def selected_fields(loader: Any) -> Optional[frozenset]:
+    """fields declared by the classes consuming the loader, None if unknown"""
+    meta = getattr(loader, '_query_meta', None)
+    if not meta or not meta.get('fields'):
+        return None
+    return frozenset(meta['fields'])
+
+
+def columns(loader: Any) -> Optional[frozenset]:
+    """columns the loader's batch function should read, None for whole rows"""
+    if not PROJECTION_ENABLED or LOADER_CACHE.enabled or COALESCE_ENABLED:
+        return None
+    return selected_fields(loader)
@@ -0,0 +1,20 @@
+"""
+pydantic_resolve.Resolver with this project's opt-in instrumentation, routes use it
+in place of pydantic_resolve.Resolver:
+
+    from common.resolver import Resolver
+
+with every feature flag off it behaves exactly like pydantic_resolve.Resolver, except for
+fields resolved by `@trusted` loaders (common.trusted), which are built without validation,
+and the model graph scan, compiled once per root class (common.plan).
+"""
+import pydantic_resolve
+
+from common.blocking import BlockingMixin
+from common.plan import PlanMixin
+from common.trace import TraceMixin
+from common.trusted import TrustedMixin
+
+
+class Resolver(TrustedMixin, TraceMixin, BlockingMixin, PlanMixin, pydantic_resolve.Resolver):
+    pass
@@ -0,0 +1,167 @@
+"""
+cache of final JSON bytes for resolver routes, hits skip both resolution and serialization
+
+    @router.get('/sprints', response_model=list[Sprint])
+    @cached_response(list[Sprint], depends_on={
+        Sprint: (STORIES_DB, 'sprint_id'),
+        SimpleStory: (TASKS_DB, 'story_id'),
+    })
+    async def get_sprints(): ...
+
+entries are keyed by route + query params and expire after a TTL. depends_on declares
+which store rows a node was built from: each Sprint in the response is tagged with
+('stories', 'sprint_id', sprint.id), so inserting or deleting a story of that sprint
+drops every cached response containing it.
+
+it is opt-in, set RESPONSE_CACHE=true to enable it, RESPONSE_CACHE_TTL (seconds, default 5)
+and RESPONSE_CACHE_SIZE (entries, default 1024) tune it.
+"""
+import functools
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple, Type
+
+from fastapi import Response
+
+from common.serialize import dump_json
+from common.singleflight import freeze
+from common.store import Table
+from common.tree import children
+
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE', 'false').lower() == 'true'
+
+Tag = Tuple[str, str, Hashable]  # (table name, column, value)
+
+
+class ResponseCache:
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key -> (expires at, body, tags)
+        self._entries: 'OrderedDict[Hashable, Tuple[float, bytes, Set[Tag]]]' = OrderedDict()
+        self._tag_index: Dict[Tag, Set[Hashable]] = {}
+        self._table_index: Dict[str, Set[Hashable]] = {}
+        self._watched: Set[Tuple[int, str]] = set()
+        # bumped on every invalidation, responses resolved meanwhile are not stored
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, body: bytes, tags: Set[Tag], ttl: Optional[float] = None):
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), body, tags)
+        for tag in tags:
+            self._tag_index.setdefault(tag, set()).add(key)
+            self._table_index.setdefault(tag[0], set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            self._tag_index.get(tag, set()).discard(key)
+            self._table_index.get(tag[0], set()).discard(key)
+
+    def invalidate_tag(self, tag: Tag):
+        self.generation += 1
+        for key in list(self._tag_index.pop(tag, ())):
+            self._remove(key)
+            self.invalidations += 1
+
+    def invalidate_table(self, name: str):
+        self.generation += 1
+        for key in list(self._table_index.pop(name, ())):
+            self._remove(key)
+            self.invalidations += 1
+
+    def watch(self, table: Table, column: str):
+        """drop entries tagged with a row's (table, column, value) when the row changes"""
+        if (id(table), column) in self._watched:
+            return
+        self._watched.add((id(table), column))
+        table.subscribe(lambda row: self.invalidate_table(table.name) if row is None
+                        else self.invalidate_tag((table.name, column, row[column])))
+
+    def clear(self):
+        self._entries.clear()
+        self._tag_index.clear()
+        self._table_index.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': RESPONSE_CACHE_ENABLED,
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+        }
+
+
+RESPONSE_CACHE = ResponseCache(
+    ttl=float(os.getenv('RESPONSE_CACHE_TTL', '5')),
+    max_entries=int(os.getenv('RESPONSE_CACHE_SIZE', '1024')))
+
+
+def collect_tags(node: Any, depends_on: Dict[Type, Tuple[Table, str]], key: str = 'id') -> Set[Tag]:
+    tags: Set[Tag] = set()
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, (list, tuple)):
+            stack.extend(current)
+            continue
+        dependency = depends_on.get(type(current))
+        if dependency is not None:
+            table, column = dependency
+            tags.add((table.name, column, getattr(current, key)))
+        stack.extend(children(current))
+    return tags
+
+
+def cached_response(
+        response_model: Any,
+        depends_on: Optional[Dict[Type, Tuple[Table, str]]] = None,
+        ttl: Optional[float] = None,
+        cache: ResponseCache = RESPONSE_CACHE) -> Callable:
+    """decorate a route endpoint, see module doc"""
+    depends_on = depends_on or {}
+    for table, column in depends_on.values():
+        cache.watch(table, column)
+
+    def decorator(endpoint):
+        route = f'{endpoint.__module__}.{endpoint.__qualname__}'
+
+        @functools.wraps(endpoint)
+        async def wrapper(**kwargs):
+            if not RESPONSE_CACHE_ENABLED:
+                return await endpoint(**kwargs)
+
+            key = (route, freeze(kwargs))
+            body = cache.get(key)
+            if body is None:
+                generation = cache.generation
+                result = await endpoint(**kwargs)
+                if isinstance(result, Response):
+                    return result
+                body = dump_json(response_model, result)
+                if cache.generation == generation:
+                    cache.set(key, body, collect_tags(result, depends_on), ttl)
+            return Response(content=body, media_type='application/json')
+        return wrapper
+    return decorator
@@ -0,0 +1,25 @@
+"""
+strawberry schema extensions for this project's opt-in instrumentation, the GraphQL
+counterpart of common.resolver.Resolver, after the document cache (common.documents,
+on by default):
+
+    schema = strawberry.Schema(query=Query, extensions=schema_extensions())
+
+with every feature flag off (GRAPHQL_DOCUMENT_CACHE=false included) the list is empty.
+"""
+from typing import Any, List
+
+from common.blocking import BLOCKING_ENABLED, BlockingExtension
+from common.documents import DOCUMENT_CACHE, DocumentCacheExtension
+from common.trace import INSTRUMENTED, TracingExtension
+
+
+def schema_extensions() -> List[Any]:
+    extensions: List[Any] = []
+    if DOCUMENT_CACHE.enabled:  # first, persisted query hashes are resolved before tracing names the operation
+        extensions.append(DocumentCacheExtension)
+    if INSTRUMENTED:
+        extensions.append(TracingExtension)
+    if BLOCKING_ENABLED:
+        extensions.append(BlockingExtension)
+    return extensions
@@ -0,0 +1,28 @@
+"""
+serialize resolved view models straight to JSON bytes
+
+routes return objects which Resolver().resolve already built and validated. the response
+cache, single flight and streamed responses encode them with the response_model's cached
+TypeAdapter instead of validating them again. plain routes keep FastAPI's response_model
+path, on FastAPI 0.143 / pydantic 2 it is the same dump_json (benchmarks/serialize.py).
+"""
+import functools
+from typing import Any
+
+from pydantic import TypeAdapter
+from pydantic_core import PydanticSerializationError
+
+
+@functools.lru_cache(maxsize=None)
+def type_adapter(tp: Any) -> TypeAdapter:
+    return TypeAdapter(tp)
+
+
+def dump_json(tp: Any, value: Any) -> bytes:
+    """encode already validated objects (pydantic, dataclass, strawberry type) as `tp`"""
+    adapter = type_adapter(tp)
+    try:
+        return adapter.dump_json(value, by_alias=True, warnings='error')
+    except PydanticSerializationError:
+        # not instances of the declared types (eg: dicts), validate first like FastAPI does
+        return adapter.dump_json(adapter.validate_python(value, from_attributes=True), by_alias=True)
@@ -0,0 +1,109 @@
+"""
+request level single-flight for resolver backed routes
+
+concurrent identical requests (same route, same query params) share one execution of
+the endpoint, `Resolver().resolve` runs once and its result is serialized once:
+
+    @router.get('/sprints', response_model=list[Sprint])
+    @single_flight(list[Sprint])
+    async def get_sprints():
+        ...
+        return await Resolver().resolve([sprint1, sprint2] * 10)
+
+loader_params built inside the endpoint are part of the route, the ones derived from
+query params are covered by the params in the key. executions and piggybacked requests
+are counted per route in common.metrics (single_flight_executions_total /
+single_flight_piggybacked_total {route}).
+
+it is opt-in, set SINGLE_FLIGHT=true to enable it.
+"""
+import asyncio
+import functools
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from fastapi import Response
+
+from common.metrics import METRICS
+from common.serialize import dump_json
+
+SINGLE_FLIGHT_ENABLED = os.getenv('SINGLE_FLIGHT', 'false').lower() == 'true'
+
+EXECUTIONS = METRICS.counter('single_flight_executions_total', 'endpoint executions started by single-flight', ('route',))
+PIGGYBACKED = METRICS.counter('single_flight_piggybacked_total', 'requests sharing an execution already in flight', ('route',))
+
+
+def freeze(value: Any) -> Hashable:
+    """hashable, order independent form of params / loader_params"""
+    if isinstance(value, dict):
+        return tuple(sorted(((freeze(k), freeze(v)) for k, v in value.items()), key=repr))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted((freeze(v) for v in value), key=repr))
+    if isinstance(value, type):
+        return f'{value.__module__}.{value.__qualname__}'
+    return value
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        # route -> {'executions': n, 'piggybacked': n}
+        self.routes: Dict[str, Dict[str, int]] = {}
+
+    async def do(self, route: str, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        counter = self.routes.setdefault(route, {'executions': 0, 'piggybacked': 0})
+        future = self._calls.get(key)
+
+        if future is None:
+            counter['executions'] += 1
+            EXECUTIONS.inc(route=route)
+            future = self._calls[key] = asyncio.ensure_future(fn())
+            future.add_done_callback(lambda f: self._calls.pop(key) if self._calls.get(key) is f else None)
+        else:
+            counter['piggybacked'] += 1
+            PIGGYBACKED.inc(route=route)
+
+        # shield: a cancelled caller must not cancel the shared execution
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'inflight': len(self._calls),
+            'executions': sum(c['executions'] for c in self.routes.values()),
+            'piggybacked': sum(c['piggybacked'] for c in self.routes.values()),
+            'routes': self.routes,
+        }
+
+
+FLIGHT = SingleFlight()
+
+
+def single_flight(response_model: Optional[Any] = None, flight: SingleFlight = FLIGHT) -> Callable:
+    """
+    decorate a route endpoint, when response_model is given the shared result is
+    serialized once and every caller gets the same JSON bytes.
+    """
+    def decorator(endpoint):
+        route = f'{endpoint.__module__}.{endpoint.__qualname__}'
+
+        async def execute(kwargs):
+            result = await endpoint(**kwargs)
+            if response_model is None or isinstance(result, Response):
+                return result
+            return dump_json(response_model, result)
+
+        @functools.wraps(endpoint)
+        async def wrapper(**kwargs):
+            if not SINGLE_FLIGHT_ENABLED:
+                return await endpoint(**kwargs)
+
+            result = await flight.do(route, (route, freeze(kwargs)), lambda: execute(kwargs))
+            if isinstance(result, bytes):
+                return Response(content=result, media_type='application/json')
+            if isinstance(result, Response):  # FastAPI attaches per request state to it
+                return Response(content=result.body, status_code=result.status_code, headers=dict(result.headers))
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,212 @@
+import asyncio
+import bisect
+import os
+from typing import Any, Callable, Collection, Dict, Iterable, List, Optional, Set, Tuple
+
+from common.filters import Filter, Where
+from common.pagination import Page
+
+# simulated round trip of the mock database in seconds, 0 disables it
+DB_LATENCY = float(os.getenv('DB_LATENCY', '0.01'))
+
+
+async def roundtrip():
+    """Simulate async DB call"""
+    if DB_LATENCY > 0:
+        await asyncio.sleep(DB_LATENCY)
+
+
+class Table:
+    """
+    in-memory table with a primary key index (id -> row) and
+    foreign key indexes (column -> value -> rows), maintained on insert/delete
+
+    group_by(column, keys) costs O(len(keys) + rows returned) instead of
+    scanning every row per batch. filters (common/filters.py) on the primary key or an
+    indexed column are looked up in the indexes, the others are checked per row.
+    page_by / count_by (common/pagination.py) only touch the rows of the page.
+    `columns` (common/projection.py) makes group_by / page_by build rows holding only
+    those columns, after the filters ran on whole rows.
+
+    listeners registered with subscribe() are called with the changed row,
+    or None when the whole table is truncated.
+    """
+    def __init__(self, name: str, rows: Iterable[dict] = (), indexes: Iterable[str] = (), pk: str = 'id'):
+        self.name = name
+        self.pk = pk
+        self._rows: Dict[Any, dict] = {}
+        # pk -> insertion sequence, orders index lookups and page cursors. kept on delete
+        # so the cursor of a deleted row still resolves
+        self._order: Dict[Any, int] = {}
+        self._sequence = 0
+        # column -> value -> {pk: row}, dict keeps insertion order and O(1) delete
+        self._indexes: Dict[str, Dict[Any, Dict[Any, dict]]] = {column: {} for column in indexes}
+        # column -> value -> pks of the bucket in insertion order (sorted by _order), for
+        # page_by to bisect a cursor and slice a page without walking the bucket
+        self._positions: Dict[str, Dict[Any, List[Any]]] = {column: {} for column in indexes}
+        self._listeners: List[Callable[[Optional[dict]], None]] = []
+
+        for row in rows:
+            self.insert(row)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        return iter(self._rows.values())
+
+    def subscribe(self, listener: Callable[[Optional[dict]], None]):
+        self._listeners.append(listener)
+
+    def _notify(self, row: Optional[dict]):
+        for listener in self._listeners:
+            listener(row)
+
+    def insert(self, row: dict) -> dict:
+        key = row[self.pk]
+        if key in self._rows:
+            raise KeyError(f'{self.name}.{self.pk}={key} already exists')
+
+        self._rows[key] = row
+        self._order[key] = self._sequence
+        self._sequence += 1
+        for column, index in self._indexes.items():
+            index.setdefault(row[column], {})[key] = row
+            self._positions[column].setdefault(row[column], []).append(key)
+        self._notify(row)
+        return row
+
+    def delete(self, key) -> Optional[dict]:
+        row = self._rows.pop(key, None)
+        if row is None:
+            return None
+
+        for column, index in self._indexes.items():
+            bucket = index[row[column]]
+            del bucket[key]
+            pks = self._positions[column][row[column]]
+            del pks[bisect.bisect_left(pks, self._order[key], key=self._order.__getitem__)]
+            if not bucket:
+                del index[row[column]]
+                del self._positions[column][row[column]]
+        self._notify(row)
+        return row
+
+    def truncate(self):
+        self._rows.clear()
+        self._order.clear()
+        for index in self._indexes.values():
+            index.clear()
+        for positions in self._positions.values():
+            positions.clear()
+        self._notify(None)
+
+    def get(self, key) -> Optional[dict]:
+        return self._rows.get(key)
+
+    def get_many(self, keys: List[Any]) -> List[Optional[dict]]:
+        return [self._rows.get(k) for k in keys]
+
+    def distinct(self, column: str) -> Optional[Iterable[Any]]:
+        """distinct values of the primary key or an indexed column, None for other columns"""
+        if column == self.pk:
+            return self._rows.keys()
+        index = self._indexes.get(column)
+        return None if index is None else index.keys()
+
+    def lookup(self, column: str, values: Collection[Any]) -> Optional[Set[Any]]:
+        """primary keys of rows whose column is in values, None if the column isn't indexed"""
+        if column == self.pk:
+            return {v for v in values if v in self._rows}
+        index = self._indexes.get(column)
+        if index is None:
+            return None
+        return {key for v in values if v in index for key in index[v]}
+
+    def _plan(self, where: Where) -> Tuple[Optional[Set[Any]], List[Filter]]:
+        """matching primary keys of the indexed filters (None: no such filter), predicates of the others"""
+        matched: Optional[Set[Any]] = None
+        predicates = []
+        for condition in where:
+            candidates = condition.candidates(self)
+            keys = None if candidates is None else self.lookup(condition.column, candidates)
+            if keys is None:
+                predicates.append(condition)
+            else:
+                matched = keys if matched is None else matched & keys
+        return matched, predicates
+
+    def group_by(self, column: str, keys: List[Any], where: Where = (),
+                 columns: Optional[Collection[str]] = None) -> List[List[dict]]:
+        """rows grouped by an indexed column, in the order of keys (DataLoader friendly)"""
+        index = self._indexes[column]
+        if not where:
+            if columns is not None:
+                return [_project(index[k].values(), columns) if k in index else [] for k in keys]
+            return [list(index[k].values()) if k in index else [] for k in keys]
+
+        matched, predicates = self._plan(where)
+        selected = None  # matching keys in insertion order, sorted on first use
+        groups = []
+        for k in keys:
+            bucket = index.get(k)
+            if not bucket:
+                rows = []
+            elif matched is None:
+                rows = list(bucket.values())
+            elif len(matched) < len(bucket):
+                # fewer matching keys than rows in the group: walk the keys instead
+                if selected is None:
+                    selected = sorted(matched, key=self._order.__getitem__)
+                rows = [bucket[key] for key in selected if key in bucket]
+            else:
+                rows = [row for key, row in bucket.items() if key in matched]
+            for predicate in predicates:
+                rows = list(filter(predicate, rows))
+            groups.append(rows if columns is None else _project(rows, columns))
+        return groups
+
+    def page_by(self, column: str, keys: List[Any], page: Page,
+                columns: Optional[Collection[str]] = None) -> List[List[dict]]:
+        """group_by with at most page.limit rows per key, skipping the rows before the page"""
+        index, positions = self._indexes[column], self._positions[column]
+        if page.after is not None and page.after not in self._order:
+            raise KeyError(f'{self.name}: unknown cursor {page.after!r}')
+        groups = []
+        for k in keys:
+            bucket = index.get(k)
+            if not bucket:
+                groups.append([])
+                continue
+            pks = positions[k]
+            # pks are in insertion order: the cursor is found by bisecting their sequences
+            start = page.offset if page.after is None else \
+                bisect.bisect_right(pks, self._order[page.after], key=self._order.__getitem__) + page.offset
+            stop = None if page.limit is None else start + page.limit
+            groups.append([bucket[pk] for pk in pks[start:stop]])
+        return groups if columns is None else [_project(rows, columns) for rows in groups]
+
+    def count_by(self, column: str, keys: List[Any]) -> List[int]:
+        """rows per key of an indexed column, no row is read"""
+        index = self._indexes[column]
+        return [len(index[k]) if k in index else 0 for k in keys]
+
+
+def _project(rows: Iterable[dict], columns: Collection[str]) -> List[dict]:
+    """copies of rows holding only `columns`"""
+    return [{c: row[c] for c in columns if c in row} for row in rows]
+
+
+# Mock database for tasks
+TASKS_DB = Table('tasks', [
+    {"id": 1, "name": "Task 1", "owner": 201, "done": False, "story_id": 1},
+    {"id": 2, "name": "Task 2", "owner": 202, "done": True, "story_id": 2},
+    {"id": 3, "name": "Task 3", "owner": 203, "done": False, "story_id": 1},
+], indexes=['story_id'])
+
+# Mock database for stories
+STORIES_DB = Table('stories', [
+    {"id": 1, "name": "Story 1", "owner": 101, "point": 5, "sprint_id": 1},
+    {"id": 2, "name": "Story 2", "owner": 102, "point": 8, "sprint_id": 1},
+    {"id": 3, "name": "Story 3", "owner": 103, "point": 3, "sprint_id": 2},
+], indexes=['sprint_id'])
@@ -0,0 +1,69 @@
+"""
+streaming mode for resolver routes
+
+`Resolver().resolve(roots)` builds the whole tree before the first byte is sent. a
+streaming route resolves the roots `chunk` at a time with a fresh Resolver (loaders
+still batch within a chunk) and writes each chunk out before resolving the next one,
+so memory is bounded by the chunk and clients can start rendering early:
+
+    @router.get('/sprints-stream')
+    async def stream_sprints(chunk: int = 4, format: StreamFormat = 'ndjson'):
+        return stream_resolved(Sprint, [sprint1, sprint2] * 10, chunk=chunk, format=format)
+
+format='ndjson' emits one root per line (application/x-ndjson), format='array' emits
+the same body as the non streaming route, a JSON array, in chunks.
+"""
+from typing import Any, AsyncIterator, Callable, Iterable, List, Literal
+
+from fastapi.responses import StreamingResponse
+
+from common.resolver import Resolver
+from common.serialize import dump_json
+
+StreamFormat = Literal['ndjson', 'array']
+
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'array': 'application/json',
+}
+
+
+async def resolve_chunks(
+        roots: Iterable[Any],
+        chunk: int,
+        resolver_factory: Callable[[], Resolver] = Resolver) -> AsyncIterator[List[Any]]:
+    """resolve roots in slices of `chunk`, the previous slice can be released meanwhile"""
+    batch: List[Any] = []
+    for root in roots:
+        batch.append(root)
+        if len(batch) >= chunk:
+            yield await resolver_factory().resolve(batch)
+            batch = []
+    if batch:
+        yield await resolver_factory().resolve(batch)
+
+
+async def encode(tp: Any, chunks: AsyncIterator[List[Any]], format: StreamFormat) -> AsyncIterator[bytes]:
+    """one write per chunk"""
+    if format == 'ndjson':
+        async for items in chunks:
+            yield b''.join(dump_json(tp, item) + b'\n' for item in items)
+        return
+
+    separator = b'['
+    async for items in chunks:
+        if items:
+            yield separator + b','.join(dump_json(tp, item) for item in items)
+            separator = b','
+    yield b']' if separator == b',' else b'[]'
+
+
+def stream_resolved(
+        tp: Any,
+        roots: Iterable[Any],
+        chunk: int = 10,
+        format: StreamFormat = 'ndjson',
+        resolver_factory: Callable[[], Resolver] = Resolver) -> StreamingResponse:
+    """resolve and serialize roots of type `tp` chunk by chunk"""
+    chunks = resolve_chunks(roots, max(chunk, 1), resolver_factory)
+    return StreamingResponse(encode(tp, chunks, format), media_type=MEDIA_TYPES[format])
@@ -0,0 +1,317 @@
+"""
+per request tracing of Resolver runs and GraphQL executions
+
+records, for one `Resolver().resolve(...)` call or one GraphQL operation:
+
+- per loader: batch count, batch sizes, wall time of the batch function and queue wait
+  (first key enqueued -> batch function called)
+- per method: calls and cumulative time of resolve_* / post_* methods
+  (module.Class.method), or of strawberry field resolvers (Type.field), awaited results
+  included
+
+the routes use `common.resolver.Resolver`, the GraphQL schemas get `TracingExtension`
+from `common.schema.schema_extensions()`. a finished trace goes to the enabled sinks:
+
+- TRACE=true: written to TRACE_DIR as Chrome trace JSON (chrome://tracing,
+  https://ui.perfetto.dev) or OTLP/JSON spans (TRACE_FORMAT=otel)
+- METRICS=true: folded into common.metrics.METRICS
+- GRAPHQL_STATS=true: the summary is attached to GraphQL responses as extensions.stats
+
+all are opt-in, TRACE_DIR (default traces), TRACE_FORMAT (chrome or otel) and
+TRACE_MAX_EVENTS (spans kept per trace, default 10000) tune the trace files.
+"""
+import contextvars
+import itertools
+import json
+import os
+import secrets
+import time
+from inspect import isawaitable
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from strawberry.extensions import SchemaExtension
+
+from common.metrics import METRICS_ENABLED, observe_trace
+from common.tree import count_nodes
+
+TRACE_ENABLED = os.getenv('TRACE', 'false').lower() == 'true'
+GRAPHQL_STATS_ENABLED = os.getenv('GRAPHQL_STATS', 'false').lower() == 'true'
+INSTRUMENTED = TRACE_ENABLED or METRICS_ENABLED or GRAPHQL_STATS_ENABLED
+TRACE_DIR = os.getenv('TRACE_DIR', 'traces')
+TRACE_FORMAT = os.getenv('TRACE_FORMAT', 'chrome')
+TRACE_MAX_EVENTS = int(os.getenv('TRACE_MAX_EVENTS', '10000'))
+
+# (name, category, start, end, args), times from time.perf_counter
+Event = Tuple[str, str, float, float, Dict[str, Any]]
+
+CURRENT_TRACE: contextvars.ContextVar[Optional['Trace']] = contextvars.ContextVar('current_trace', default=None)
+
+_sequence = itertools.count(1)
+
+
+class Trace:
+    def __init__(self, label: str, source: str, max_events: int = TRACE_MAX_EVENTS if TRACE_ENABLED else 0):
+        self.label = label
+        self.source = source
+        self.max_events = max_events
+        self.started = time.perf_counter()
+        self.started_ns = time.time_ns()
+        self.finished: Optional[float] = None
+        self.nodes: Optional[int] = None  # objects in the result, counted for metrics
+
+        self.events: List[Event] = []
+        self.dropped = 0
+        # loader name -> {'sizes', 'walls', 'waits'}, one item per batch
+        self.loaders: Dict[str, Dict[str, Any]] = {}
+        # method name -> {'calls', 'total'}
+        self.methods: Dict[str, Dict[str, Any]] = {}
+
+    def _event(self, event: Event):
+        if len(self.events) < self.max_events:
+            self.events.append(event)
+        elif self.max_events:
+            self.dropped += 1
+
+    def record_batch(self, name: str, size: int, start: float, end: float, queue_wait: float):
+        stat = self.loaders.setdefault(name, {'sizes': [], 'walls': [], 'waits': []})
+        stat['sizes'].append(size)
+        stat['walls'].append(end - start)
+        stat['waits'].append(queue_wait)
+        self._event((name, 'loader', start, end, {'keys': size, 'queue_wait_ms': round(queue_wait * 1000, 3)}))
+
+    def record_call(self, name: str, category: str, start: float, end: float):
+        stat = self.methods.setdefault(name, {'calls': 0, 'total': 0.0})
+        stat['calls'] += 1
+        stat['total'] += end - start
+        self._event((name, category, start, end, {}))
+
+    def timed(self, name: str, category: str, fn: Callable, *args, **kwargs) -> Any:
+        """call fn, an awaitable result is timed until it is awaited"""
+        start = time.perf_counter()
+        value = fn(*args, **kwargs)
+        if not isawaitable(value):
+            self.record_call(name, category, start, time.perf_counter())
+            return value
+
+        async def wait():
+            try:
+                return await value
+            finally:
+                self.record_call(name, category, start, time.perf_counter())
+        return wait()
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def duration(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'label': self.label,
+            'source': self.source,
+            'duration_ms': round(self.duration * 1000, 3),
+            'loaders': {
+                name: {
+                    'batches': len(s['sizes']),
+                    'keys': sum(s['sizes']),
+                    'sizes': s['sizes'],
+                    'wall_ms': round(sum(s['walls']) * 1000, 3),
+                    'queue_wait_ms': round(sum(s['waits']) * 1000, 3),
+                } for name, s in self.loaders.items()
+            },
+            'methods': {
+                name: {'calls': s['calls'], 'total_ms': round(s['total'] * 1000, 3)}
+                for name, s in sorted(self.methods.items(), key=lambda i: -i[1]['total'])
+            },
+            'dropped_events': self.dropped,
+        }
+
+    def chrome(self) -> Dict[str, Any]:
+        """Chrome trace event format, one lane (tid) per category"""
+        lanes: Dict[str, int] = {self.label: 0}
+        pid = os.getpid()
+
+        def event(name, category, start, end, args):
+            return {
+                'name': name, 'cat': category, 'ph': 'X', 'pid': pid,
+                'tid': lanes.setdefault(category, len(lanes)),
+                'ts': round((start - self.started) * 1e6, 3),
+                'dur': round((end - start) * 1e6, 3),
+                'args': args,
+            }
+
+        events = [event(self.label, self.label, self.started, self.started + self.duration, {})]
+        events += [event(*e) for e in self.events]
+        events += [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': category}}
+                   for category, tid in lanes.items()]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': self.summary()}
+
+    def otel(self) -> Dict[str, Any]:
+        """OTLP/JSON, events are children of one root span"""
+        trace_id = secrets.token_hex(16)
+        root_id = secrets.token_hex(8)
+
+        def ns(t: float) -> str:
+            return str(self.started_ns + int((t - self.started) * 1e9))
+
+        def attributes(values: Dict[str, Any]) -> List[Dict[str, Any]]:
+            return [{'key': k, 'value': {'doubleValue': v} if isinstance(v, float)
+                     else {'intValue': str(v)} if isinstance(v, int)
+                     else {'stringValue': str(v)}} for k, v in values.items()]
+
+        def span(name, category, start, end, args, span_id, parent_id=''):
+            return {
+                'traceId': trace_id, 'spanId': span_id, 'parentSpanId': parent_id,
+                'name': name, 'kind': 1,
+                'startTimeUnixNano': ns(start), 'endTimeUnixNano': ns(end),
+                'attributes': attributes({'category': category, **args}),
+            }
+
+        spans = [span(self.label, 'request', self.started, self.started + self.duration, {}, root_id)]
+        spans += [span(*e, secrets.token_hex(8), root_id) for e in self.events]
+        return {'resourceSpans': [{
+            'resource': {'attributes': attributes({'service.name': 'resolver-vs-graphql'})},
+            'scopeSpans': [{'scope': {'name': __name__}, 'spans': spans}],
+        }]}
+
+    def write(self, directory: str = TRACE_DIR, format: str = TRACE_FORMAT) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{self.started_ns}-{next(_sequence)}-{self.label}.{format}.json')
+        with open(path, 'w') as f:
+            json.dump(self.otel() if format == 'otel' else self.chrome(), f)
+        return path
+
+
+def _pending(loader: Any) -> int:
+    """keys waiting for the next batch"""
+    queue = getattr(loader, '_queue', None)  # aiodataloader
+    if queue is not None:
+        return len(queue)
+    batch = getattr(loader, 'batch', None)  # strawberry
+    return 0 if batch is None or batch.dispatched else len(batch)
+
+
+def instrument_loader(loader: Any, name: str, trace: Trace):
+    """wrap the load / batch function of an aiodataloader or strawberry DataLoader instance"""
+    attr = 'load_fn' if hasattr(loader, 'load_fn') else 'batch_load_fn'
+    batch_fn = getattr(loader, attr)
+    load = loader.load
+    pending_since: List[float] = []
+
+    def traced_load(key):
+        before = _pending(loader)
+        future = load(key)
+        if before == 0 and not pending_since and _pending(loader):
+            pending_since.append(time.perf_counter())
+        return future
+
+    async def traced_batch(keys):
+        start = time.perf_counter()
+        queue_wait = start - pending_since.pop() if pending_since else 0.0
+        try:
+            return await batch_fn(keys)
+        finally:
+            trace.record_batch(name, len(keys), start, time.perf_counter(), queue_wait)
+
+    loader.load = traced_load
+    setattr(loader, attr, traced_batch)
+
+
+def loader_name(loader: Any) -> str:
+    fn = getattr(loader, 'load_fn', None)
+    target = fn if fn is not None else type(loader)
+    return f'{target.__module__}.{target.__qualname__}'
+
+
+def export(trace: Trace):
+    trace.finish()
+    if TRACE_ENABLED:
+        trace.write()
+    if METRICS_ENABLED:
+        observe_trace(trace)
+
+
+def class_label(kls: type) -> str:
+    """module qualified, the pydantic and dataclass views share class names (Sprint, Story)"""
+    return f'{kls.__module__}.{kls.__qualname__}'
+
+
+class TraceMixin:
+    """records a Trace per resolve() call, mixed into common.resolver.Resolver"""
+    _trace: Optional[Trace] = None
+
+    async def resolve(self, node):
+        if not INSTRUMENTED:
+            return await super().resolve(node)
+
+        root = node[0] if isinstance(node, list) and node else node
+        self._trace = Trace(f'resolve.{class_label(type(root))}', 'resolver')
+        self._traced_loaders = False
+        token = CURRENT_TRACE.set(self._trace)
+        try:
+            result = await super().resolve(node)
+            if METRICS_ENABLED:
+                self._trace.nodes = count_nodes(result)
+            return result
+        finally:
+            CURRENT_TRACE.reset(token)
+            export(self._trace)
+
+    def _instrument_loaders(self):
+        # loader instances are created in resolve(), before the first resolve method runs
+        if not self._traced_loaders:
+            self._traced_loaders = True
+            for path, loader in self.loader_instance_cache.items():
+                instrument_loader(loader, path, self._trace)
+
+    def _execute_resolve_method(self, kls, field, method):
+        if self._trace is None:
+            return super()._execute_resolve_method(kls, field, method)
+        self._instrument_loaders()
+        return self._trace.timed(f'{class_label(kls)}.{field}', 'resolve', super()._execute_resolve_method, kls, field, method)
+
+    def _execute_post_method(self, node, kls, kls_path, field, method):
+        if self._trace is None:
+            return super()._execute_post_method(node, kls, kls_path, field, method)
+        self._instrument_loaders()
+        return self._trace.timed(f'{class_label(kls)}.{field}', 'post', super()._execute_post_method,
+                                 node, kls, kls_path, field, method)
+
+    def _execute_post_default_handler(self, node, kls, kls_path, method):
+        if self._trace is None:
+            return super()._execute_post_default_handler(node, kls, kls_path, method)
+        return self._trace.timed(f'{class_label(kls)}.{method.__name__}', 'post', super()._execute_post_default_handler,
+                                 node, kls, kls_path, method)
+
+
+class TracingExtension(SchemaExtension):
+    """strawberry counterpart of TraceMixin, fields are recorded as Type.field"""
+    def on_operation(self) -> Iterator[None]:
+        context = self.execution_context
+        self.trace = Trace(f'graphql.{context.operation_name or "anonymous"}', 'graphql')
+        for loader in context_loaders(context.context):
+            instrument_loader(loader, loader_name(loader), self.trace)
+
+        token = CURRENT_TRACE.set(self.trace)
+        try:
+            yield
+            if METRICS_ENABLED and context.result is not None and context.result.data:
+                # the root data object is the operation, not a node
+                self.trace.nodes = count_nodes(list(context.result.data.values()))
+        finally:
+            CURRENT_TRACE.reset(token)
+            export(self.trace)
+
+    def resolve(self, _next, root, info, *args, **kwargs):
+        return self.trace.timed(f'{info.parent_type.name}.{info.field_name}', 'field', _next, root, info, *args, **kwargs)
+
+    def get_results(self) -> Dict[str, Any]:
+        return {'stats': self.trace.summary()} if GRAPHQL_STATS_ENABLED else {}
+
+
+def context_loaders(context: Any) -> List[Any]:
+    from strawberry.dataloader import DataLoader
+    values = vars(context).values() if hasattr(context, '__dict__') else ()
+    return [v for v in values if isinstance(v, DataLoader)]
@@ -0,0 +1,35 @@
+"""walk resolved trees of pydantic models / dataclasses (strawberry types included)"""
+import dataclasses
+from typing import Any, Iterator
+
+from pydantic import BaseModel
+
+from common.columnar import Rows
+
+
+def children(node: Any) -> Iterator[Any]:
+    if isinstance(node, BaseModel):
+        for name in type(node).model_fields:
+            yield getattr(node, name)
+    elif dataclasses.is_dataclass(node) and not isinstance(node, type):
+        for f in dataclasses.fields(node):
+            yield getattr(node, f.name)
+
+
+def count_nodes(node: Any) -> int:
+    """objects in a resolved tree, dicts count as objects (GraphQL result data)"""
+    count = 0
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, (list, tuple)):
+            stack.extend(current)
+        elif isinstance(current, dict):
+            count += 1
+            stack.extend(current.values())
+        elif isinstance(current, Rows):  # leaf objects kept in columns
+            count += len(current)
+        elif isinstance(current, BaseModel) or (dataclasses.is_dataclass(current) and not isinstance(current, type)):
+            count += 1
+            stack.extend(children(current))
+    return count
@@ -0,0 +1,131 @@
+"""
+skip validation of rows coming from trusted loaders
+
+a resolve_ method's result is validated into the field's type (list[Story] ...) on every
+request, though rows of the mock store are already well typed. a loader class marked
+`@trusted` declares its rows pre-validated, the fields it resolves are then built by
+pydantic-core from the target class' schema with every field accepting any value
+(`model_construct` semantics, done in Rust): no type checks nor coercion, defaults
+filled in, unknown keys ignored. pydantic models and dataclasses (pydantic, plain or
+common.compact ones) are supported:
+
+    @trusted
+    class TaskLoader(DataLoader):
+        async def batch_load_fn(self, story_ids): ...
+
+rows must be flat dicts (or instances of the target class), nested node fields are left
+to their resolve_ methods. annotations other than node classes, list / Optional / Columnar
+of them, classes with private attributes, post init hooks or extra='allow' fall back to
+validation. set TRUSTED_VALIDATE=true to validate everything again (debugging a loader).
+
+it is opt-in per loader. python -m benchmarks.trusted: validating flat scalar rows costs
+about as much as building the objects does, so the demo loaders are not marked and keep
+validation; the saving grows with the cost of field validators.
+"""
+import dataclasses
+import functools
+import os
+import typing
+from asyncio import isfuture
+from inspect import iscoroutine
+from typing import Any, Callable, List, Optional, Union
+
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined, SchemaValidator, core_schema
+from pydantic_resolve import analysis
+from pydantic_resolve import constant as const
+from pydantic_resolve.exceptions import MissingAnnotationError
+
+from common.columnar import Rows
+
+TRUSTED_VALIDATE = os.getenv('TRUSTED_VALIDATE', 'false').lower() == 'true'
+
+Constructor = Callable[[Any], Any]
+
+
+def trusted(loader_kls: type) -> type:
+    """mark a DataLoader class as returning pre-validated rows"""
+    loader_kls.__trusted__ = True
+    return loader_kls
+
+
+def _field_schema(default: Any, factory: Any) -> core_schema.CoreSchema:
+    if factory not in (None, dataclasses.MISSING):
+        return core_schema.with_default_schema(core_schema.any_schema(), default_factory=factory)
+    if default in (PydanticUndefined, dataclasses.MISSING):
+        return core_schema.any_schema()
+    return core_schema.with_default_schema(core_schema.any_schema(), default=default)
+
+
+def _node_schema(kls: type) -> Optional[core_schema.CoreSchema]:
+    """the class' own schema with every field accepting any value"""
+    if issubclass(kls, BaseModel):
+        if kls.__private_attributes__ or kls.__pydantic_post_init__ or kls.model_config.get('extra') == 'allow':
+            return None
+        fields = {name: core_schema.model_field(_field_schema(info.default, info.default_factory))
+                  for name, info in kls.model_fields.items()}
+        return core_schema.model_schema(kls, core_schema.model_fields_schema(fields))
+    if hasattr(kls, '__post_init__'):
+        return None
+    fields = dataclasses.fields(kls)
+    args = [core_schema.dataclass_field(f.name, _field_schema(f.default, f.default_factory), kw_only=True)
+            for f in fields]
+    return core_schema.dataclass_schema(kls, core_schema.dataclass_args_schema(kls.__name__, args),
+                                        [f.name for f in fields], slots=hasattr(kls, '__slots__'))
+
+
+def _schema(tp: Any) -> Optional[core_schema.CoreSchema]:
+    if typing.get_origin(tp) is list:
+        item = _schema(typing.get_args(tp)[0])
+        return None if item is None else core_schema.list_schema(item)
+    if typing.get_origin(tp) is Union:
+        args = [arg for arg in typing.get_args(tp) if arg is not type(None)]
+        inner = _schema(args[0]) if len(args) == 1 else None
+        return None if inner is None else core_schema.nullable_schema(inner)
+    if isinstance(tp, type) and (issubclass(tp, BaseModel) or dataclasses.is_dataclass(tp)):
+        return _node_schema(tp)
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def constructor(tp: Any) -> Optional[Constructor]:
+    """builds values of annotation `tp` without type checks, None if not supported"""
+    if getattr(tp, '__columnar__', False):
+        items = constructor(List[tp.__args__[0]])
+        return None if items is None else (lambda rows: rows if isinstance(rows, Rows) else items(rows))
+    schema = _schema(tp)
+    return None if schema is None else SchemaValidator(schema).validate_python
+
+
+@functools.lru_cache(maxsize=None)
+def _field_annotation(kls: type, field: str) -> Any:
+    if issubclass(kls, BaseModel):
+        return kls.model_fields[field].annotation
+    return typing.get_type_hints(kls)[field]
+
+
+class TrustedMixin:
+    """Resolver mixin, fields resolved only by @trusted loaders are constructed, see module doc"""
+    def _trusted_constructor(self, kls, field: str, trim_field: str, method) -> Optional[Constructor]:
+        if TRUSTED_VALIDATE or getattr(method, const.HAS_MAPPER_FUNCTION, False):
+            return None
+        loaders = analysis.get_resolve_method_param(kls, field, self.metadata)['dataloaders']
+        if not loaders or not all(getattr(self.loader_instance_cache[loader['path']], '__trusted__', False)
+                                  for loader in loaders):
+            return None
+        return constructor(_field_annotation(kls, trim_field))
+
+    async def _execute_resolve_method_field(self, node, kls, field, trim_field, method):
+        construct = self._trusted_constructor(kls, field, trim_field, method)
+        if construct is None:
+            return await super()._execute_resolve_method_field(node, kls, field, trim_field, method)
+
+        # pydantic_resolve.Resolver._execute_resolve_method_field, building the value with `construct`
+        if self.ensure_type and not method.__annotations__:
+            raise MissingAnnotationError(f'{field}: return annotation is required')
+        val = self._execute_resolve_method(kls, field, method)
+        while iscoroutine(val) or isfuture(val):
+            val = await val
+        val = construct(val)
+        val = await self._traverse(val, node)
+        setattr(node, trim_field, val)
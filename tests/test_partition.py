@@ -0,0 +1,68 @@
+"""
+PartitionedLoader (common/partition.py): one backend call per argument set, per key results
+
+    pip install -r requirements-dev.txt
+    python -m pytest tests
+"""
+import asyncio
+from typing import Any, Hashable, List, Tuple
+
+import pytest
+
+from app_filter.graphql import batch_load_stories_with_filter
+from common import store
+from common.partition import PartitionedLoader, canonical
+from common.store import STORIES_DB
+
+
+class Backend:
+    """batch function recording (args, keys) per call, answers (args, key) per key"""
+    def __init__(self):
+        self.calls: List[Tuple[Hashable, List[Any]]] = []
+
+    async def __call__(self, args, keys):
+        self.calls.append((args, keys))
+        return [(args, key) for key in keys]
+
+
+def test_one_call_per_argument_set():
+    backend = Backend()
+    filters = [[1, 2, 3], (1, 2, 3), [4, 5], {5, 4}, frozenset({4, 5}), {'owner': 101}, {'owner': 101}]
+    keys = [(sprint_id, filters[sprint_id % len(filters)]) for sprint_id in range(100)]
+
+    async def run():
+        loader = PartitionedLoader(load_fn=backend)
+        return await asyncio.gather(*[loader.load(key) for key in keys])
+
+    results = asyncio.run(run())
+    args = [call_args for call_args, _ in backend.calls]
+    assert sorted(map(repr, args)) == sorted(map(repr, {canonical(f) for f in filters}))
+    assert sorted(key for _, call_keys in backend.calls for key in call_keys) == list(range(100))
+    assert results == [(canonical(f), sprint_id) for sprint_id, f in keys]
+
+
+def test_mixed_filters_in_one_tick(monkeypatch):
+    monkeypatch.setattr(store, 'DB_LATENCY', 0)
+    filters = [[1, 2, 3], [2, 3, 4], [], [3]]
+    keys = [(sprint_id, ids) for sprint_id in (1, 2) for ids in filters]
+
+    async def run():
+        loader = PartitionedLoader(load_fn=batch_load_stories_with_filter)
+        return await asyncio.gather(*[loader.load(key) for key in keys])
+
+    for (sprint_id, ids), stories in zip(keys, asyncio.run(run())):
+        expected = [row['id'] for row in STORIES_DB.group_by('sprint_id', [sprint_id])[0]
+                    if not ids or row['id'] in ids]
+        assert [story.id for story in stories] == expected
+
+
+def test_wrong_result_count_fails_the_batch():
+    async def short(args, keys):
+        return keys[1:]
+
+    async def run():
+        loader = PartitionedLoader(load_fn=short)
+        return await asyncio.gather(loader.load((1, [1])), loader.load((2, [1])))
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())